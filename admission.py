@@ -0,0 +1,133 @@
+import os
+import asyncio
+
+
+class Overloaded(Exception):
+    """
+    단계별 동시 실행 한도 초과
+    - status 429: 대기열이 가득 참 (즉시 거절)
+    - status 503: 대기열에서 기다리다 deadline 초과
+    """
+
+    def __init__(self, stage: str, status: int, reason: str):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.status = status
+        self.reason = reason
+
+
+class _Slot:
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self):
+        # 여러 경로(스트림 종료 / GC)에서 호출돼도 한 번만 반환
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class StageLimiter:
+    """
+    단계별 동시 실행 한도 + 제한된 대기열
+    - 실행 중 < limit: 바로 통과
+    - 대기 중 >= max_queue: 429 로 즉시 거절
+    - timeout 초 안에 자리가 안 나면: 503
+    """
+
+    def __init__(self, stage: str, limit: int, max_queue: int, timeout: float):
+        self.stage = stage
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._sem = None
+
+    def _semaphore(self):
+        # 이벤트 루프가 뜬 뒤에 생성
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.limit)
+        return self._sem
+
+    async def acquire(self, timeout: float = None) -> _Slot:
+        sem = self._semaphore()
+        if sem.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.stage, 429, "queue full")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(sem.acquire(), timeout=self.timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise Overloaded(self.stage, 503, "queue timeout")
+            finally:
+                self.waiting -= 1
+        else:
+            await sem.acquire()
+        self.active += 1
+        return _Slot(self)
+
+    async def acquire_many(self, n: int) -> list:
+        """
+        자리 n개를 한 번에 확보 (/answer/batch)
+        - 지금 비어 있는 자리가 n개보다 적으면 기다리지 않고 429
+        - 일부만 잡은 채 대기하면서 단건 요청 / 다른 배치와 자리를 나눠 갖는 상황을 막음
+        """
+        if n <= 0:
+            return []
+        if self.limit - self.active < n:
+            self.rejected += 1
+            raise Overloaded(self.stage, 429, f"not enough free slots for batch of {n}")
+        slots = []
+        try:
+            for _ in range(n):
+                slots.append(await self.acquire(timeout=0))
+        except BaseException:
+            for slot in slots:
+                slot.release()
+            raise
+        return slots
+
+    def _release(self):
+        self.active -= 1
+        self._semaphore().release()
+
+    async def run(self, fn, *args, **kwargs):
+        slot = await self.acquire()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            slot.release()
+
+    def counter_names(self) -> tuple:
+        # stats() 중 누적값(counter)인 항목
+        return f"admission_{self.stage}_rejected_total", f"admission_{self.stage}_timeout_total"
+
+    def stats(self) -> dict:
+        return {
+            f"admission_{self.stage}_active": self.active,
+            f"admission_{self.stage}_queue_depth": self.waiting,
+            f"admission_{self.stage}_rejected_total": self.rejected,
+            f"admission_{self.stage}_timeout_total": self.timed_out
+        }
+
+
+def _limiter(stage: str, prefix: str, limit: int, queue: int, timeout: float) -> StageLimiter:
+    return StageLimiter(
+        stage,
+        limit=int(os.getenv(f"{prefix}_CONCURRENCY", str(limit))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+        timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", str(timeout)))
+    )
+
+
+llm_stream_limiter = _limiter("llm_stream", "LLM_STREAM", 16, 32, 5.0)
+small_llm_limiter = _limiter("small_llm", "SMALL_LLM", 8, 16, 1.0)
+embed_limiter = _limiter("embed", "EMBED", 64, 256, 2.0)
+
+limiters = (llm_stream_limiter, small_llm_limiter, embed_limiter)
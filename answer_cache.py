@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+# 0이면 유사 질문 조회 비활성화 (정규화 질의 완전 일치만 사용)
+ANSWER_CACHE_SIM_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIM_THRESHOLD", "0"))
+
+
+class AnswerCache:
+    """
+    생성된 답변 캐시
+    - 키: (정규화 질의, top-k 정치인 id, 해당 정치인들의 데이터 버전)
+    - 같은 top-k/버전 안에서 질의 임베딩 유사도로 근사 조회 가능
+    - 값: LLM이 스트리밍한 chunk 리스트 (그대로 재생)
+    """
+
+    def __init__(self, maxsize: int, sim_threshold: float = 0):
+        self.maxsize = maxsize
+        self.sim_threshold = sim_threshold
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()   # (query, ids, versions) -> (query_vec, chunks)
+        self._by_pid = {}            # pid -> set of keys
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vec):
+        if vec is None:
+            return None
+        v = np.asarray(vec, dtype=np.float32)
+        n = np.linalg.norm(v)
+        return v / n if n else v
+
+    def get(self, query: str, ids: tuple, versions: tuple, query_vec=None):
+        with self._lock:
+            key = (query, ids, versions)
+            entry = self._data.get(key)
+
+            if entry is None and self.sim_threshold > 0 and query_vec is not None:
+                q = self._unit(query_vec)
+                best, best_sim = None, self.sim_threshold
+                for k in self._by_pid.get(ids[0], ()) if ids else ():
+                    if k[1] != ids or k[2] != versions:
+                        continue
+                    vec = self._data[k][0]
+                    if vec is None:
+                        continue
+                    sim = float(np.dot(q, vec))
+                    if sim >= best_sim:
+                        best, best_sim = k, sim
+                if best is not None:
+                    key, entry = best, self._data[best]
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, ids: tuple, versions: tuple, chunks: list, query_vec=None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            key = (query, ids, versions)
+            self._data[key] = (self._unit(query_vec), list(chunks))
+            self._data.move_to_end(key)
+            for pid in ids:
+                self._by_pid.setdefault(pid, set()).add(key)
+            while len(self._data) > self.maxsize:
+                old_key, _ = self._data.popitem(last=False)
+                self._unlink(old_key)
+
+    def _unlink(self, key):
+        for pid in key[1]:
+            keys = self._by_pid.get(pid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_pid[pid]
+
+    def invalidate_politicians(self, ids):
+        """
+        데이터가 바뀐 정치인이 포함된 답변 모두 제거
+        """
+        with self._lock:
+            for pid in ids:
+                for key in list(self._by_pid.get(int(pid), ())):
+                    self._data.pop(key, None)
+                    self._unlink(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_pid.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+answer_cache = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_SIM_THRESHOLD)
@@ -0,0 +1,99 @@
+"""
+벤치마크용 가짜 외부 서버
+- 정치인 API: POLITICIAN_API_URL 과 같은 {"page": n} → {"data": [...]} 형식
+- OpenAI 호환 /v1/chat/completions: 설정한 지연으로 토큰 스트리밍
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _serve(handler_cls) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_politician_api(dataset: list, page_size: int = 100, latency: float = 0.05) -> str:
+    class Handler(_QuietHandler):
+        def do_POST(self):
+            page = int(self._read_json().get("page", 1))
+            time.sleep(latency)
+            start = (page - 1) * page_size
+            self._send_json({"data": dataset[start:start + page_size]})
+
+    server = _serve(Handler)
+    return f"http://127.0.0.1:{server.server_port}/politicians"
+
+
+def start_fake_openai(first_token_latency: float = 0.3, token_latency: float = 0.02,
+                      answer_tokens: int = 60, names_response: str = "[]") -> str:
+    """
+    - stream=True: first_token_latency 후 토큰을 token_latency 간격으로 SSE 전송
+    - stream=False (이름 추출 등): first_token_latency 후 names_response 반환
+    """
+    class Handler(_QuietHandler):
+        def do_POST(self):
+            body = self._read_json()
+            time.sleep(first_token_latency)
+
+            if not body.get("stream"):
+                self._send_json({
+                    "id": "bench", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "bench"),
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": names_response}
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(obj):
+                payload = ("data: " + (obj if isinstance(obj, str) else json.dumps(obj, ensure_ascii=False)) + "\n\n").encode("utf-8")
+                self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+                self.wfile.flush()
+
+            try:
+                for i in range(answer_tokens):
+                    if i:
+                        time.sleep(token_latency)
+                    send({
+                        "id": "bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": body.get("model", "bench"),
+                        "choices": [{"index": 0, "delta": {"content": f"토큰{i} "}, "finish_reason": None}]
+                    })
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = _serve(Handler)
+    return f"http://127.0.0.1:{server.server_port}/v1"
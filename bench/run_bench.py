@@ -0,0 +1,271 @@
+"""
+Qdrant / OpenAI 없이 돌리는 오프라인 벤치마크
+
+- Qdrant: 로컬 메모리 모드 (QDRANT_LOCATION=":memory:")
+- 정치인 API / OpenAI: bench/fake_servers.py 의 가짜 서버
+- 1) update_politicians_daily 처리량 (정치인/초)
+- 2) /answer 동시 부하: 단계별 지연, p50/p95/p99, TTFT, RPS
+
+사용법 (저장소 루트에서): python -m bench.run_bench --politicians 2000 --requests 300 --concurrency 16
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from bench.fake_servers import start_fake_openai, start_politician_api
+from bench.synthetic import make_dataset
+
+QUESTION_TEMPLATES = [
+    "{name}은 누구야?",
+    "{name} 경력 알려줘",
+    "{name}의 학력은?",
+    "{name}과 {other} 비교해줘",
+    "{name} 선거 기록 알려줘",
+    "서울 강남구 국회의원 알려줘",
+    "더불어민주당 소속 정치인은?",
+]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    idx = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[idx]
+
+
+def summarize(label, values_ms):
+    print(
+        f"  {label:<24} n={len(values_ms):<5} "
+        f"p50={percentile(values_ms, 50):8.1f}ms  p95={percentile(values_ms, 95):8.1f}ms  "
+        f"p99={percentile(values_ms, 99):8.1f}ms"
+    )
+
+
+# --- 단계별 시간 측정 (main 모듈의 함수를 감싸서 기록) ---
+stage_times = defaultdict(list)
+_stage_lock = threading.Lock()
+
+
+def _record(stage, start):
+    with _stage_lock:
+        stage_times[stage].append((time.perf_counter() - start) * 1000)
+
+
+def _wrap_async(stage, fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _record(stage, start)
+    return wrapper
+
+
+def _wrap_sync(stage, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(stage, start)
+    return wrapper
+
+
+def instrument(main):
+    for attr, stage in (
+        ("afind_names", "name_extraction"),
+        ("aembed", "query_embedding"),
+        ("aembed_batch", "name_embedding"),
+        ("afind_ids_by_exact_names", "exact_name_lookup"),
+        ("asearch_names_batch", "name_search(qdrant)"),
+        ("asearch_vectors", "basic_search"),
+        ("asearch_by_ids", "filtered_search"),
+        ("aget_full_payloads", "detail_retrieval"),
+    ):
+        if hasattr(main, attr):
+            setattr(main, attr, _wrap_async(stage, getattr(main, attr)))
+    for attr, stage in (("build_rag_prompt", "prompt_build"), ("rerank_scores", "rerank")):
+        if hasattr(main, attr):
+            setattr(main, attr, _wrap_sync(stage, getattr(main, attr)))
+
+
+async def mirror_to_async(qdrant, aqdrant, collections):
+    """
+    로컬 메모리 모드는 sync / async 클라이언트가 저장소를 공유하지 않으므로 데이터를 복사
+    """
+    from qdrant_client.models import PointStruct
+
+    for name in collections:
+        info = qdrant.get_collection(name)
+        await aqdrant.create_collection(collection_name=name, vectors_config=info.config.params.vectors)
+        offset = None
+        while True:
+            points, offset = qdrant.scroll(
+                collection_name=name, limit=500, offset=offset, with_payload=True, with_vectors=True
+            )
+            if points:
+                await aqdrant.upsert(
+                    collection_name=name,
+                    points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+                )
+            if offset is None:
+                break
+
+
+def start_api_server(app):
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def run_load(base_url, queries, concurrency, secret):
+    import httpx
+
+    latencies, ttfts, errors = [], [], 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def one(q):
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                first = None
+                try:
+                    async with client.stream("POST", "/answer", json={"query": q}, headers={"x-ai-key": secret}) as res:
+                        if res.status_code != 200:
+                            errors += 1
+                            return
+                        async for chunk in res.aiter_raw():
+                            if chunk and first is None:
+                                first = time.perf_counter()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                end = time.perf_counter()
+                latencies.append((end - start) * 1000)
+                if first is not None:
+                    ttfts.append((first - start) * 1000)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        wall = time.perf_counter() - wall_start
+
+    return latencies, ttfts, errors, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 /answer · 수집 벤치마크")
+    parser.add_argument("--politicians", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="정치인 API 페이지당 지연(초)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-first-token", type=float, default=0.3, help="LLM 첫 토큰 지연(초)")
+    parser.add_argument("--llm-token-latency", type=float, default=0.02, help="LLM 토큰 간 지연(초)")
+    parser.add_argument("--llm-tokens", type=int, default=60)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로도 출력")
+    args = parser.parse_args()
+
+    dataset = make_dataset(args.politicians)
+    api_url = start_politician_api(dataset, page_size=args.page_size, latency=args.api_latency)
+    openai_url = start_fake_openai(
+        first_token_latency=args.llm_first_token,
+        token_latency=args.llm_token_latency,
+        answer_tokens=args.llm_tokens
+    )
+
+    # 프로젝트 모듈 import 전에 환경 구성
+    secret = "bench"
+    os.environ["QDRANT_LOCATION"] = ":memory:"
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["AI_SECRET_KEY"] = secret
+    data_dir = tempfile.mkdtemp(prefix="bench_data_")
+    os.environ.setdefault("NAME_INDEX_DIR", os.path.join(data_dir, "name_index"))
+    os.environ.setdefault("LEXICAL_INDEX_PATH", os.path.join(data_dir, "lexical_index.npz"))
+    os.environ.setdefault("PAYLOAD_DB_PATH", os.path.join(data_dir, "payloads.sqlite3"))
+    os.environ.setdefault("SYNC_STATUS_PATH", os.path.join(data_dir, "sync_status.json"))
+    sys.path.insert(0, os.getcwd())
+
+    import update_politicians
+    import store
+    from config import QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL
+
+    update_politicians.POLITICIAN_API_URL = api_url
+    store.init_collection()
+
+    # 1) 수집 처리량
+    print(f"\n[BENCH] 수집: 정치인 {len(dataset)}명")
+    start = time.perf_counter()
+    stats = update_politicians.update_politicians_daily()
+    ingest_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resync_stats = update_politicians.update_politicians_daily()
+    resync_sec = time.perf_counter() - start
+
+    asyncio.run(mirror_to_async(store.qdrant, store.aqdrant, [QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL]))
+
+    # 2) /answer 부하
+    import main as api
+
+    instrument(api)
+    server, base_url = start_api_server(api.app)
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.requests):
+        a, b = rng.sample(dataset, 2)
+        queries.append(rng.choice(QUESTION_TEMPLATES).format(name=a["name"], other=b["name"]))
+
+    print(f"[BENCH] /answer: 요청 {len(queries)}건, 동시성 {args.concurrency}")
+    latencies, ttfts, errors, wall = asyncio.run(run_load(base_url, queries, args.concurrency, secret))
+    server.should_exit = True
+
+    print("\n===== 수집 =====")
+    print(f"  전체 동기화  {ingest_sec:8.2f}s  ({len(dataset) / ingest_sec:8.1f} 정치인/초)  {stats}")
+    print(f"  재동기화     {resync_sec:8.2f}s  ({len(dataset) / resync_sec:8.1f} 정치인/초)  {resync_stats}")
+
+    print("\n===== /answer =====")
+    print(f"  완료 {len(latencies)}건 / 오류 {errors}건 / {wall:.2f}s  →  {len(latencies) / wall:.1f} req/s")
+    summarize("end_to_end", latencies)
+    summarize("time_to_first_token", ttfts)
+
+    print("\n===== 단계별 =====")
+    for stage in sorted(stage_times):
+        summarize(stage, stage_times[stage])
+
+    if args.json:
+        print(json.dumps({
+            "ingest_politicians_per_sec": len(dataset) / ingest_sec,
+            "resync_politicians_per_sec": len(dataset) / resync_sec,
+            "rps": len(latencies) / wall,
+            "errors": errors,
+            "latency_ms": {p: percentile(latencies, p) for p in (50, 95, 99)},
+            "ttft_ms": {p: percentile(ttfts, p) for p in (50, 95, 99)},
+            "stages_ms": {s: {p: percentile(v, p) for p in (50, 95, 99)} for s, v in stage_times.items()}
+        }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+JSON_SCHEMA_DESCRIPTION 형식을 따르는 가짜 정치인 데이터 생성
+"""
+import random
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허남심노하곽성차주우구민유나진지엄채원천방공현함변염여추도소석선설마길연위표명기반라왕금옥육인맹제모탁국어은편용예경봉사부가복태목형피두감호제"
+GIVEN = "민서준도윤예시하주지현우건은유진수영재동성호정원혜경상훈석철명희태선미연"
+
+CITIES = ["서울특별시", "부산광역시", "대구광역시", "인천광역시", "광주광역시", "대전광역시", "경기도", "강원도"]
+DISTRICTS = ["강남구", "종로구", "해운대구", "수성구", "남동구", "북구", "유성구", "수원시", "춘천시", "마포구"]
+PARTIES = ["더불어민주당", "국민의힘", "정의당", "개혁신당", "조국혁신당", "진보당"]
+JOBS = ["국회의원", "변호사", "교수", "기업인", "시민운동가", "의사"]
+SCHOOLS = ["서울대학교 법학과 졸업", "고려대학교 경제학과 졸업", "연세대학교 정치외교학과 졸업", "부산대학교 행정학과 졸업"]
+CAREERS = ["(현) 국회의원", "전 법무부 장관", "전 시장", "전 당 대표", "전 청와대 비서관", "전 도지사"]
+
+
+def _party(rng, pid):
+    return {
+        "politicalPartyId": pid,
+        "name": PARTIES[pid % len(PARTIES)],
+        "countMembers": rng.randint(1, 180),
+        "foundYear": f"{rng.randint(1990, 2024)}-01-01",
+        "representativeName": "대표" + str(pid),
+        "personalColor": "#%06x" % rng.randint(0, 0xFFFFFF),
+        "logoImage": "https://example.com/logo.png",
+        "coverImage": "https://example.com/cover.png"
+    }
+
+
+def _district(rng, did):
+    city_idx = did % len(CITIES)
+    people = rng.randint(100000, 400000)
+    total = int(people * rng.uniform(0.5, 0.8))
+    return {
+        "zoneElectionDistrictId": did,
+        "zoneCity": {"zoneCityId": city_idx, "name": CITIES[city_idx]},
+        "name": DISTRICTS[did % len(DISTRICTS)],
+        "peopleCount": people,
+        "totalVoteCount": total,
+        "realVoteCount": int(total * 0.98),
+        "ignoredVoteCount": int(total * 0.02),
+        "abandonedVoteCount": people - total
+    }
+
+
+def make_name(rng) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN)
+
+
+def make_politician(rng, pid: int, name: str) -> dict:
+    electors = []
+    for i in range(rng.randint(0, 6)):
+        round_ = 17 + i
+        winner = rng.random() < 0.4
+        electors.append({
+            "electorId": pid * 100 + i,
+            "electionType": {
+                "electionTypeId": 1,
+                "electionMainType": "CONGRESS_MAN",
+                "electionSubType": "CONGRESS_MAN",
+                "electionDate": f"{2004 + 4 * i}-04-15",
+                "round": round_
+            },
+            "electorTypes": ["CANDIDATE", "ELECTION_WINNER"] if winner else ["CANDIDATE"],
+            "politicalParty": _party(rng, rng.randrange(len(PARTIES))),
+            "zoneElectionDistrict": _district(rng, rng.randrange(40)),
+            "informationUrl": f"https://example.com/elector/{pid}/{i}",
+            "preliminaryRegisteredDate": f"{2004 + 4 * i}-02-01",
+            "electionNum": rng.randint(1, 9),
+            "winner": winner,
+            "voteCount": rng.randint(1000, 100000),
+            "votePercentage": round(rng.uniform(1, 70), 2)
+        })
+
+    return {
+        "politicianId": pid,
+        "name": name,
+        "gender": rng.choice(["MAN", "WOMAN"]),
+        "birthDate": f"{rng.randint(1950, 1990)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "address": f"{rng.choice(CITIES)} {rng.choice(DISTRICTS)}",
+        "job": rng.sample(JOBS, 2),
+        "career": rng.sample(CAREERS, 3),
+        "education": rng.sample(SCHOOLS, 2),
+        "criminalRecord": rng.choice([0, 0, 0, 1, 2]),
+        "image": "https://example.com/image.png",
+        "politicalParty": _party(rng, rng.randrange(len(PARTIES))),
+        "electors": electors,
+        "ranking": rng.randint(1, 1000),
+        "follower": rng.randint(0, 100000)
+    }
+
+
+def make_dataset(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(make_name(rng))
+    return [make_politician(rng, i + 1, name) for i, name in enumerate(sorted(names))]
@@ -1,74 +1,192 @@
+import os
 import json
+import logging
 
-def build_rag_prompt(question: str, hits) -> str:
-    context = ""
+logger = logging.getLogger(__name__)
+
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "3000"))
+
+POLITICIAN_FIELDS = (
+    "politicianId", "name", "gender", "birthDate", "address",
+    "job", "career", "education", "criminalRecord"
+)
+PARTY_FIELDS = ("politicalPartyId", "name", "countMembers", "foundYear", "representativeName", "personalColor")
+ELECTION_TYPE_FIELDS = ("electionMainType", "electionSubType", "electionDate", "round")
+ELECTOR_FIELDS = (
+    "electorTypes", "informationUrl", "preliminaryRegisteredDate",
+    "electionNum", "winner", "voteCount", "votePercentage"
+)
+DISTRICT_FIELDS = (
+    "name", "peopleCount", "totalVoteCount", "realVoteCount", "ignoredVoteCount", "abandonedVoteCount"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # 한글 등 비ASCII는 글자당 1토큰, ASCII는 4글자당 1토큰으로 보수적 추정
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+
+def _pick(d, fields) -> dict:
+    if not isinstance(d, dict):
+        return {}
+    return {f: d[f] for f in fields if d.get(f) not in (None, "", [], {})}
+
+
+def _iter_payloads(hits):
+    # main에서 [[payload, ...]] 형태로 넘어오는 경우도 평탄화
     for h in hits:
-        # h은 full politician json
-        context += "정치인 정보:\n" + json.dumps(h, ensure_ascii=False) + "\n\n"
+        if isinstance(h, list):
+            yield from _iter_payloads(h)
+        elif isinstance(h, dict):
+            yield h
+
+
+def build_context(hits, token_budget: int = RAG_CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    top-k 정치인 JSON을 프롬프트용으로 압축
+    - 필요한 필드만 남김 (이미지, ranking, follower 등 제외)
+    - 정당 / 선거 지역은 parties / districts 로 한 번만 싣고 id로 참조
+    - 토큰 예산을 넘으면 가장 오래된 선거 기록부터 제거
+    """
+    parties = {}
+    districts = {}
+    politicians = []
+
+    def add_party(party):
+        pp = _pick(party, PARTY_FIELDS)
+        pid = pp.get("politicalPartyId")
+        if pid is None:
+            return None
+        parties.setdefault(str(pid), {k: v for k, v in pp.items() if k != "politicalPartyId"})
+        return pid
+
+    for p in _iter_payloads(hits):
+        item = _pick(p, POLITICIAN_FIELDS)
+
+        party_id = add_party(p.get("politicalParty"))
+        if party_id is not None:
+            item["politicalPartyId"] = party_id
+
+        electors = []
+        for e in p.get("electors") or []:
+            if not isinstance(e, dict):
+                continue
+            el = _pick(e, ELECTOR_FIELDS)
+            el.update(_pick(e.get("electionType"), ELECTION_TYPE_FIELDS))
+
+            e_party_id = add_party(e.get("politicalParty"))
+            if e_party_id is not None:
+                el["politicalPartyId"] = e_party_id
+
+            zone = e.get("zoneElectionDistrict")
+            if isinstance(zone, dict) and zone.get("zoneElectionDistrictId") is not None:
+                zid = str(zone["zoneElectionDistrictId"])
+                if zid not in districts:
+                    dist = _pick(zone, DISTRICT_FIELDS)
+                    city = (zone.get("zoneCity") or {}).get("name")
+                    if city:
+                        dist["city"] = city
+                    districts[zid] = dist
+                el["zoneElectionDistrictId"] = zone["zoneElectionDistrictId"]
+
+            electors.append(el)
+
+        if electors:
+            item["electors"] = electors
+        politicians.append(item)
+
+    def serialize():
+        # 선거 기록을 지우고 나면 참조가 끊긴 정당 / 지역이 생기므로 남은 참조만 싣는다
+        party_refs = set()
+        district_refs = set()
+        for item in politicians:
+            if "politicalPartyId" in item:
+                party_refs.add(str(item["politicalPartyId"]))
+            for el in item.get("electors", []):
+                if "politicalPartyId" in el:
+                    party_refs.add(str(el["politicalPartyId"]))
+                if "zoneElectionDistrictId" in el:
+                    district_refs.add(str(el["zoneElectionDistrictId"]))
+
+        context = {"politicians": politicians}
+        used_parties = {k: v for k, v in parties.items() if k in party_refs}
+        if used_parties:
+            context["parties"] = used_parties
+        used_districts = {k: v for k, v in districts.items() if k in district_refs}
+        if used_districts:
+            context["districts"] = used_districts
+        return json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+    text = serialize()
+    while estimate_tokens(text) > token_budget:
+        # 전체 후보 중 가장 오래된 선거 기록 1건 제거
+        oldest = None
+        for item in politicians:
+            for idx, el in enumerate(item.get("electors", [])):
+                key = str(el.get("electionDate") or "")
+                if oldest is None or key < oldest[0]:
+                    oldest = (key, item, idx)
+        if oldest is None:
+            break
+        _, item, idx = oldest
+        del item["electors"][idx]
+        if not item["electors"]:
+            del item["electors"]
+        text = serialize()
+
+    return text
+
+
+def build_rag_prompt(question: str, hits) -> str:
+    context = build_context(hits)
 
     prompt = f"""
 1. 당신은 정치인 정보를 답변하는 AI 모델입니다.
 
-2. 아래 정치인 정보(JSON)들만 참고해 답하십시오:
+2. 아래 정치인 정보(JSON)만 참고해 답하십시오:
 {context}
 
-3. JSON 필드의 의미는 아래와 같습니다:
-- politicianId: 정치인 고유 ID
-- name: 이름
-- gender: 성별(MAN: 남자, WOMAN: 여자)
-- birthDate: 생년월일
-- address: 거주지 (실제로 살고 있는 지역)
-- job: 직업 또는 직함 (줄바꿈으로 구분되어있음)
-- career: 주요 경력 (줄바꿈으로 구분되어있음. 앞에 (현)이 붙여지면 현재 하고 있는것.)
-- education: 학력 (줄바꿈으로 구분되어있음)
-- criminalRecord: 전과 여부(숫자만. 0=없음)
-- image: 데이터 무시(ignore)
-- politicalParty: 정치인의 정당 정보
-    - politicalPartyId: 정당 고유 ID
+3. JSON 구조와 필드의 의미는 아래와 같습니다:
+- politicians: 정치인 배열
+    - politicianId: 정치인 고유 ID
+    - name: 이름
+    - gender: 성별(MAN: 남자, WOMAN: 여자)
+    - birthDate: 생년월일
+    - address: 거주지 (실제로 살고 있는 지역)
+    - job: 직업 또는 직함 (줄바꿈으로 구분되어있음)
+    - career: 주요 경력 (줄바꿈으로 구분되어있음. 앞에 (현)이 붙여지면 현재 하고 있는것.)
+    - education: 학력 (줄바꿈으로 구분되어있음)
+    - criminalRecord: 전과 여부(숫자만. 0=없음)
+    - politicalPartyId: 현재 소속 정당 ID (parties 참고)
+    - electors: 선거 출마 기록 배열
+        - electionMainType: CONGRESS_MAN(국회의원) 혹은 PRESIDENT(대통령)
+        - electionSubType: CONGRESS_PRESIDENT_MAN(국회의원+대통령) 혹은 CONGRESS_MAN(국회의원) 혹은 PRESIDENT(대통령)
+        - electionDate: 선거(투표) 일자
+        - round: 몇대 선거 (예: 숫자 22라면, 22대 선거)
+        - electorTypes: PRELIMINARY_CANDIDATE(예비 후보자), CANDIDATE(후보자), ELECTION_WINNER(당선자) 배열
+        - politicalPartyId: 출마 당시 정당 ID (parties 참고)
+        - zoneElectionDistrictId: 선거 지역 ID (districts 참고)
+        - informationUrl: 참고 URL (해당 선거 정보를 자세히 보고 싶다면 여기로 안내)
+        - preliminaryRegisteredDate: 예비후보자 등록 날짜
+        - electionNum: 후보자가 기호 몇번인지
+        - winner: true or false (당선 되었는지 안되었는지)
+        - voteCount: 후보자가 받은 투표 수
+        - votePercentage: 몇퍼센트로 투표 받았는지
+- parties: 정당 ID별 정보
     - name: 정당 이름
     - countMembers: 정당에 들어있는 국회의원 수
     - foundYear: 정당 설립일
     - representativeName: 정당 대표 이름
     - personalColor: 정당 대표 색깔 (RGB 코드)
-    - logoImage: 데이터 무시(ignore)
-    - coverImage: 데이터 무시(ignore)
-- electors: 정치인의 선거 출마 기록 배열 (여러개 올수있음)
-    - electorId: 선거 고유 ID
-    - electionType:
-        - electionTypeId: 선거 타입 고유 ID
-        - electionMainType: CONGRESS_MAN(국회의원) 혹은 PRESIDENT(대통령) 올 수 있음
-        - electionSubType: CONGRESS_PRESIDENT_MAN(국회의원+대통령) 혹은 CONGRESS_MAN(국회의원) 혹은 PRESIDENT(대통령) 올 수 있음
-        - electionDate: 선거(투표) 일자
-        - round: 몇대 선거 (예: 숫자 22라면, 22대 선거)
-    - electorTypes: 배열 형태로 PRELIMINARY_CANDIDATE(예비 후보자), CANDIDATE(후보자), ELECTION_WINNER(당선자)가 올 수 있음. 여러개 올수있음
-    - politicalParty: 정당 정보
-        - politicalPartyId: 정당 고유 ID
-        - name: 정당 이름
-        - countMembers: 정당에 들어있는 국회의원 수
-        - foundYear: 정당 설립일
-        - representativeName: 정당 대표 이름
-        - personalColor: 정당 대표 색깔 (RGB 코드)
-        - logoImage: 데이터 무시(ignore)
-        - coverImage: 데이터 무시(ignore)
-    - zoneElectionDistrict: 선거 지역
-        - zoneElectionDistrictId: 선거 지역 고유ID
-        - zoneCity: 도시
-            - zoneCityId: 도시 고유ID
-            - name: 도시 이름
-        - name: 지역(구시군) 이름
-        - peopleCount: 해당 선거 지역의 사람 총원 수 (투표할 수 있는 총원)
-        - totalVoteCount: 총 투표 수 [선거 지역기준]
-        - realVoteCount: 실제 정상적으로 투표된 수 [선거 지역기준]
-        - ignoredVoteCount: 무효 투표 수 [선거 지역기준]
-        - abandonedVoteCount: 기권 투표 수 [선거 지역기준]
-    - informationUrl: 참고 URL (해당 선거 정보를 자세히 보고 싶다면 여기로 안내)
-    - preliminaryRegisteredDate: 예비후보자 등록 날짜
-    - electionNum: 후보자가 기호 몇번인지
-    - winner: true or false (당선 되었는지 안되었는지)
-    - voteCount: 후보자가 받은 투표 수
-    - votePercentage: 몇퍼센트로 투표 받았는지
-- ranking: 데이터 무시(ignore)
-- follower: 데이터 무시(ignore)
+- districts: 선거 지역 ID별 정보
+    - city: 도시 이름
+    - name: 지역(구시군) 이름
+    - peopleCount: 해당 선거 지역의 사람 총원 수 (투표할 수 있는 총원)
+    - totalVoteCount: 총 투표 수 [선거 지역기준]
+    - realVoteCount: 실제 정상적으로 투표된 수 [선거 지역기준]
+    - ignoredVoteCount: 무효 투표 수 [선거 지역기준]
+    - abandonedVoteCount: 기권 투표 수 [선거 지역기준]
 
 4. 답변하는 규칙:
 - json에 등장하는 정보만 사용
@@ -86,6 +204,6 @@ def build_rag_prompt(question: str, hits) -> str:
 답변:
 """.strip()
 
-    print(prompt)
+    logger.debug("prompt:\n%s", prompt)
 
     return prompt
@@ -0,0 +1,72 @@
+"""
+임베딩 사이드카 서버
+- 모델을 이 프로세스 하나에만 올리고, uvicorn 워커들은 EMBED_BACKEND=remote 로 Unix 소켓 요청
+- 워커 수는 RAM 이 아니라 CPU 기준으로 늘릴 수 있음
+- 여러 워커에서 동시에 들어온 요청은 MicroBatcher 로 묶어 encode 1회로 처리, 임베딩 캐시도 워커 간 공유
+
+실행 예)
+  python embed_server.py
+  EMBED_BACKEND=remote uvicorn main:app --workers 8
+"""
+import os
+import json
+import struct
+import asyncio
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# 서버 자신은 실제 모델 백엔드를 사용 (.env 의 EMBED_BACKEND=remote 를 덮어씀)
+os.environ["EMBED_BACKEND"] = os.getenv("EMBED_SERVER_BACKEND", "torch")
+
+import numpy as np
+
+from embedder import (
+    EMBED_SOCKET_PATH, EMBED_BATCH_MAX, embed_cache, _batcher, _executor, embed_batch, warmup_embedder
+)
+
+
+async def _encode(texts: list) -> np.ndarray:
+    if len(texts) > EMBED_BATCH_MAX:
+        # 동기화처럼 큰 배치는 그대로 한 번에 인코딩
+        return await asyncio.get_running_loop().run_in_executor(_executor, embed_batch, texts)
+
+    result = [embed_cache.get(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, v in zip(texts, result) if v is None))
+    if missing:
+        encoded = dict(zip(missing, await asyncio.gather(*(_batcher.submit(t) for t in missing))))
+        result = [v if v is not None else encoded[t] for t, v in zip(texts, result)]
+    return np.stack(result).astype(np.float32, copy=False)
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                (size,) = struct.unpack("!I", await reader.readexactly(4))
+                texts = json.loads(await reader.readexactly(size))
+            except asyncio.IncompleteReadError:
+                break
+
+            try:
+                body, status = (await _encode(texts)).tobytes(), 0
+            except Exception as e:
+                body, status = repr(e).encode("utf-8"), 1
+            writer.write(struct.pack("!BI", status, len(body)) + body)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(path: str = EMBED_SOCKET_PATH):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path=path)
+    print(f"[EMBED SERVER] {path} 대기 중")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    warmup_embedder()
+    asyncio.run(serve())
@@ -1,6 +1,360 @@
-from sentence_transformers import SentenceTransformer
+import os
+import re
+import json
+import time
+import socket
+import struct
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+# EMBED_BACKEND 등은 import 시점에 읽으므로 어떤 진입점에서 import 되든 .env 먼저 반영
+load_dotenv()
+
+from admission import embed_limiter
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "0"))  # 초 단위, 0이면 만료 없음
+# 동시 요청 마이크로배칭: 최대 대기 시간(ms) / 최대 묶음 크기
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "3"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIM = 384
+# torch: SentenceTransformer / onnx: ONNX Runtime (int8 양자화 모델, export_onnx.py 로 생성)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_PATH = os.getenv("EMBED_ONNX_PATH", "models/all-MiniLM-L6-v2-int8.onnx")
+# remote: 모델은 embed_server.py 한 곳에만 올리고 워커는 Unix 소켓으로 요청
+EMBED_SOCKET_PATH = os.getenv("EMBED_SOCKET_PATH", "/tmp/politician-embed.sock")
+EMBED_CONNECT_TIMEOUT = float(os.getenv("EMBED_CONNECT_TIMEOUT", "30"))
+# 요청 1건 송수신 제한 시간 (사이드카가 멈춰도 임베딩 스레드 / embed_limiter 자리가 묶이지 않도록)
+EMBED_REQUEST_TIMEOUT = float(os.getenv("EMBED_REQUEST_TIMEOUT", "10"))
+
+
+class SentenceTransformerBackend:
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(EMBED_MODEL_NAME)
+
+    def encode(self, texts: list, batch_size: int) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime CPU 백엔드
+    - SentenceTransformer 와 동일하게 mean pooling + L2 정규화 → 기존 384차원 cosine 컬렉션과 호환
+    """
+
+    def __init__(self, model_path: str = EMBED_ONNX_PATH):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBED_BACKEND=onnx 를 사용하려면 onnxruntime 설치가 필요합니다.") from e
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(EMBED_MODEL_NAME)
+
+    def encode(self, texts: list, batch_size: int) -> np.ndarray:
+        out = []
+        for i in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=256,
+                return_tensors="np"
+            )
+            feeds = {k: v.astype(np.int64) for k, v in tokens.items() if k in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append(pooled.astype(np.float32))
+        return np.concatenate(out, axis=0)
+
+
+def recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("임베딩 서버 연결이 끊어졌습니다.")
+        buf += chunk
+    return bytes(buf)
+
+
+class RemoteBackend:
+    """
+    embed_server.py 사이드카에 임베딩 요청 (uvicorn 워커마다 모델을 올리지 않음)
+    - 요청: 4바이트 길이 + 문장 리스트 JSON
+    - 응답: 1바이트 상태(0 성공) + 4바이트 길이 + float32 행렬 바이트 / 에러 메시지
+    - 임베딩 스레드마다 연결 1개 유지, 끊기면 1회 재연결
+    - 응답이 EMBED_REQUEST_TIMEOUT 안에 오지 않으면 연결을 버리고 실패 처리 (재시도 없음)
+    """
+
+    def __init__(self, path: str = EMBED_SOCKET_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        deadline = time.monotonic() + EMBED_CONNECT_TIMEOUT
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(EMBED_REQUEST_TIMEOUT)
+            try:
+                sock.connect(self.path)
+                return sock
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                # 사이드카가 아직 뜨는 중이면 잠시 대기
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"임베딩 서버({self.path})에 연결할 수 없습니다.")
+                time.sleep(0.2)
+
+    def _request(self, sock: socket.socket, body: bytes) -> np.ndarray:
+        sock.sendall(struct.pack("!I", len(body)) + body)
+        status, size = struct.unpack("!BI", recv_exact(sock, 5))
+        data = recv_exact(sock, size)
+        if status != 0:
+            raise RuntimeError(f"임베딩 서버 오류: {data.decode('utf-8', 'replace')}")
+        return np.frombuffer(data, dtype=np.float32).reshape(-1, EMBED_DIM)
+
+    def encode(self, texts: list, batch_size: int) -> np.ndarray:
+        body = json.dumps(texts, ensure_ascii=False).encode("utf-8")
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            if sock is None:
+                sock = self._local.sock = self._connect()
+            try:
+                return self._request(sock, body)
+            except socket.timeout as e:
+                # 응답 도중 끊긴 연결은 재사용할 수 없음
+                sock.close()
+                self._local.sock = None
+                raise RuntimeError(f"임베딩 서버 응답 시간 초과 ({EMBED_REQUEST_TIMEOUT}s)") from e
+            except OSError:
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+
+
+_BACKENDS = {
+    "torch": SentenceTransformerBackend,
+    "onnx": OnnxBackend,
+    "remote": RemoteBackend,
+}
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """
+    임베딩 모델은 처음 사용할 때 로드 (import 시점에 torch / 모델을 올리지 않음)
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                backend = _BACKENDS.get(EMBED_BACKEND)
+                if backend is None:
+                    raise ValueError(f"알 수 없는 EMBED_BACKEND: {EMBED_BACKEND}")
+                _embedder = backend()
+                print(f"[EMBEDDER] {EMBED_BACKEND} 백엔드 로드 완료")
+    return _embedder
+
+
+def warmup_embedder():
+    # 서버 시작 시 모델 로드 + 첫 추론 비용을 미리 지불
+    get_embedder().encode(["warmup"], 1)
+
+# CPU 연산(encode)을 이벤트 루프 밖에서 돌리기 위한 제한된 스레드풀
+_executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed")
+
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+_HONORIFIC_RE = re.compile(r"(?<=\w{2})(님|씨)(?=\s|$)")
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 키용 정규화
+    - 문장부호 제거, 공백 정리
+    - 이름 뒤 호칭(님/씨) 제거
+    """
+    s = _PUNCT_RE.sub(" ", text)
+    s = _SPACE_RE.sub(" ", s).strip()
+    s = _HONORIFIC_RE.sub("", s)
+    return s.lower()
+
+
+class EmbeddingCache:
+    """
+    정규화된 문장 → float32 벡터 LRU 캐시 (선택적 TTL)
+    """
+
+    def __init__(self, maxsize: int, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                vec, created = entry
+                if not self.ttl or time.monotonic() - created < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return vec
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vec: np.ndarray):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (np.asarray(vec, dtype=np.float32), time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+embed_cache = EmbeddingCache(EMBED_CACHE_SIZE, EMBED_CACHE_TTL)
 
-embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
 def embed(text: str):
-    return embedder.encode(text).tolist()
+    return embed_batch([text])[0].tolist()
+
+
+def embed_batch(texts: list, batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """
+    여러 문장을 한번에 임베딩
+    - texts: 임베딩할 문장 리스트
+    - batch_size: encode 1회당 처리할 문장 수
+    - 반환: (len(texts), 384) float32 행렬
+    """
+    if not texts:
+        return np.empty((0, EMBED_DIM), dtype=np.float32)
+
+    vectors = get_embedder().encode(list(texts), batch_size)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _encode_and_cache(keys: list, batch_size: int = EMBED_BATCH_SIZE) -> dict:
+    encoded = dict(zip(keys, embed_batch(keys, batch_size)))
+    for k, vec in encoded.items():
+        embed_cache.put(k, vec)
+    return encoded
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 질의 임베딩 요청을 짧은 시간(window) 동안 모아 encode 1회로 처리
+    - window_ms 가 지나거나 max_batch 개가 모이면 즉시 실행
+    - 각 호출자는 자기 결과를 future로 돌려받음
+    """
+
+    def __init__(self, max_batch: int, window_ms: float):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._pending = []  # (key, future)
+        self._timer = None
+
+    async def submit(self, key: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((key, fut))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        keys = list(dict.fromkeys(k for k, _ in batch))
+        loop = asyncio.get_running_loop()
+        try:
+            encoded = await loop.run_in_executor(_executor, _encode_and_cache, keys)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for key, fut in batch:
+            if not fut.done():
+                fut.set_result(encoded[key])
+
+
+_batcher = MicroBatcher(EMBED_BATCH_MAX, EMBED_BATCH_WINDOW_MS)
+
+
+async def aembed(text: str):
+    key = normalize_text(text)
+    vec = embed_cache.get(key)
+    if vec is None:
+        vec = await embed_limiter.run(_batcher.submit, key)
+    return vec.tolist()
+
+
+async def aembed_batch(texts: list) -> np.ndarray:
+    """
+    질의용 임베딩: 정규화 키로 캐시 조회 후 없는 문장만 마이크로배치로 인코딩
+    """
+    if not texts:
+        return embed_batch([])
+
+    keys = [normalize_text(t) for t in texts]
+    result = [embed_cache.get(k) for k in keys]
+
+    missing = list(dict.fromkeys(k for k, v in zip(keys, result) if v is None))
+    if missing:
+        encoded = dict(zip(missing, await asyncio.gather(*(embed_limiter.run(_batcher.submit, k) for k in missing))))
+        result = [v if v is not None else encoded[k] for k, v in zip(keys, result)]
+
+    return np.stack(result).astype(np.float32, copy=False)
@@ -0,0 +1,51 @@
+"""
+EMBED_BACKEND=onnx 용 모델 생성
+- all-MiniLM-L6-v2 트랜스포머를 ONNX로 export
+- onnxruntime 동적 양자화(int8) 적용
+
+사용법: python export_onnx.py [출력 경로]
+"""
+import os
+import sys
+
+import torch
+from transformers import AutoModel, AutoTokenizer
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+from embedder import EMBED_MODEL_NAME, EMBED_ONNX_PATH
+
+
+def export_onnx(out_path: str = EMBED_ONNX_PATH):
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    fp32_path = out_path.replace(".onnx", "-fp32.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(EMBED_MODEL_NAME)
+    model = AutoModel.from_pretrained(EMBED_MODEL_NAME).eval()
+
+    sample = tokenizer(["정치인 검색"], return_tensors="pt")
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    dynamic = {0: "batch", 1: "seq"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            inputs,
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "last_hidden_state": dynamic
+            },
+            opset_version=14
+        )
+
+    quantize_dynamic(fp32_path, out_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print(f"[ONNX] {out_path} 생성 완료")
+
+
+if __name__ == "__main__":
+    export_onnx(sys.argv[1] if len(sys.argv) > 1 else EMBED_ONNX_PATH)
@@ -1,8 +1,13 @@
 import re
 import json
+import logging
 from typing import List
 
-from model import run_small_llm
+from admission import small_llm_limiter, Overloaded
+from model import arun_small_llm
+from extract.name_matcher import match_names
+
+logger = logging.getLogger(__name__)
 
 
 def _clean_name(raw: str) -> str:
@@ -25,13 +30,8 @@ def _extract_json_array(text: str) -> List[str]:
         return []
 
 
-def extract_name_from_text(query: str, max_names: int = 3) -> List[str]:
-    """
-    LLM 전용 이름 추출
-    - query: 사용자 입력 문장
-    - max_names: 반환 최대 개수
-    """
-    prompt = f"""
+def _build_prompt(query: str, max_names: int) -> str:
+    return f"""
 규칙은 아래와 같습니다.
 - 설명하지 말 것
 - 이름만 JSON 배열로 출력
@@ -48,12 +48,11 @@ def extract_name_from_text(query: str, max_names: int = 3) -> List[str]:
 
 JSON 배열만 출력하세요. 다른 글자는 절대 출력하지 마세요. 사람 이름이 없으면 []만 출력하세요.
 """
-    raw = run_small_llm(prompt)
-    print("raw 데이터: ")
-    print(raw)
+
+def _parse_names(raw: str, max_names: int) -> List[str]:
+    logger.debug("raw 데이터: %s", raw)
     names = _extract_json_array(raw)
-    print("names: ")
-    print(names)
+    logger.debug("names: %s", names)
 
     # 중복 제거 및 최대 개수 제한
     unique = []
@@ -64,3 +63,29 @@ JSON 배열만 출력하세요. 다른 글자는 절대 출력하지 마세요.
             break
     return unique
 
+
+async def aextract_name_from_text(query: str, max_names: int = 3) -> List[str]:
+    """
+    LLM 전용 이름 추출 (이벤트 루프를 막지 않음)
+    - query: 사용자 입력 문장
+    - max_names: 반환 최대 개수
+    """
+    raw = await arun_small_llm(_build_prompt(query, max_names))
+    return _parse_names(raw, max_names)
+
+
+async def afind_names(query: str, max_names: int = 3) -> List[str]:
+    """
+    이름 추출 진입점
+    - 1순위: 로컬 이름 사전 매칭 (LLM 호출 없음)
+    - 2순위: 사전에서 못 찾은 경우에만 LLM 추출
+    """
+    names = match_names(query, max_names=max_names)
+    if names:
+        return names
+    try:
+        return await small_llm_limiter.run(aextract_name_from_text, query, max_names=max_names)
+    except Overloaded as e:
+        # 과부하 시 LLM 이름 추출은 건너뛰고 일반 검색으로 진행
+        logger.warning("LLM 이름 추출 생략: %s", e)
+        return []
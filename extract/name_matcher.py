@@ -0,0 +1,148 @@
+from collections import deque
+from typing import List
+
+from config import QDRANT_COLLECTION_BASIC
+from store import scroll_payload_field
+
+# 이름 바로 뒤에 붙어도 되는 조사 / 호칭 (긴 것부터 검사)
+_SUFFIXES = tuple(sorted((
+    "은", "는", "이", "가", "을", "를", "의", "와", "과", "도", "만", "에", "랑", "님", "씨",
+    "이랑", "하고", "에게", "한테", "보다", "부터", "까지", "이나", "이란", "이는", "이가",
+    "에서", "께서", "의원", "대표", "후보", "대통령", "장관", "시장", "지사", "위원장",
+), key=len, reverse=True))
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _at_boundary(text: str, start: int, end: int) -> bool:
+    """
+    이름 앞은 어절 시작, 뒤는 어절 끝이거나 조사 / 호칭이어야 함
+    - '정의당' 의 '정의', '김정의' 의 '정의' 는 이름으로 보지 않음
+    """
+    if start > 0 and _is_word_char(text[start - 1]):
+        return False
+    return _ends_word(text, end, depth=2)
+
+
+def _ends_word(text: str, pos: int, depth: int) -> bool:
+    # '이재명님은', '윤석열대통령의' 처럼 조사 / 호칭이 최대 depth 개까지 이어져도 허용
+    if pos >= len(text) or not _is_word_char(text[pos]):
+        return True
+    if depth == 0:
+        return False
+    return any(
+        text.startswith(suffix, pos) and _ends_word(text, pos + len(suffix), depth - 1)
+        for suffix in _SUFFIXES
+    )
+
+
+class NameMatcher:
+    """
+    정치인 이름 사전 기반 Aho-Corasick 매처
+    - 질문 문장을 한 번만 훑어서 사전에 있는 이름을 모두 찾음
+    - '이재명님', '윤석열의' 처럼 뒤에 붙은 조사/호칭은 부분 문자열 매칭이라 자연히 무시됨
+    - 이름은 어절 경계에서만 인정 ('정의당' 안의 '정의' 처럼 다른 단어 속 이름은 무시, _at_boundary)
+    """
+
+    def __init__(self, names, ids_by_name: dict = None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.size = 0
+        # 이름 → 정치인 id 목록 (동명이인 포함), 찾은 이름을 Qdrant 조회 없이 바로 id 로
+        self.ids_by_name = ids_by_name or {}
+
+        for name in names:
+            self._add(name)
+        self._build_fail_links()
+
+    def _add(self, name: str):
+        if not name or len(name) < 2:
+            return
+        node = 0
+        for ch in name:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if name not in self._out[node]:
+            self._out[node].append(name)
+            self.size += 1
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str, max_names: int = 3) -> List[str]:
+        """
+        text 안의 이름을 등장 순서대로 반환 (겹치면 긴 이름 우선, 중복 제거)
+        """
+        hits = []  # (start, end, name)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for name in self._out[node]:
+                start = i - len(name) + 1
+                if _at_boundary(text, start, i + 1):
+                    hits.append((start, i + 1, name))
+
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+
+        unique = []
+        last_end = 0
+        for start, end, name in hits:
+            if start < last_end:
+                continue
+            last_end = end
+            if name not in unique:
+                unique.append(name)
+            if len(unique) >= max_names:
+                break
+        return unique
+
+
+name_matcher = NameMatcher([])
+
+
+def rebuild_name_matcher():
+    """
+    BASIC 컬렉션에 저장된 이름으로 매처 재생성 (동기화 직후 / 서버 시작 시 호출)
+    """
+    global name_matcher
+    names = scroll_payload_field(QDRANT_COLLECTION_BASIC, "name")
+    ids_by_name = {}
+    for pid, n in names.items():
+        if isinstance(n, str) and n.strip():
+            ids_by_name.setdefault(n.strip(), []).append(pid)
+    name_matcher = NameMatcher(ids_by_name, ids_by_name)
+    print(f"[NAME MATCHER] 이름 {name_matcher.size}개 로드 완료")
+
+
+def match_names(query: str, max_names: int = 3) -> List[str]:
+    return name_matcher.find(query, max_names=max_names)
+
+
+def lookup_name_ids(names: List[str]):
+    """
+    이름 사전으로 이름 → id 목록 조회
+    - 반환: {name: [id, ...]} (사전에 없는 이름은 빠짐) / 사전이 아직 없으면 None
+    """
+    if not name_matcher.ids_by_name:
+        return None
+    return {nm: name_matcher.ids_by_name[nm] for nm in names if nm in name_matcher.ids_by_name}
@@ -0,0 +1,211 @@
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+
+from config import QDRANT_COLLECTION_BASIC
+from store import scroll_payload_field
+
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "data/lexical_index.npz")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[^\w]+")
+
+
+def tokenize(text: str) -> list:
+    """
+    한국어 글자 bigram 토큰화 (띄어쓰기 단위로 자른 뒤 각 어절을 2글자씩)
+    - '강남구' → ['강남', '남구'] / 1글자 어절은 그대로
+    """
+    tokens = []
+    for word in _TOKEN_RE.split(text.lower()):
+        if not word:
+            continue
+        if len(word) == 1:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _as_lines(v) -> list:
+    if isinstance(v, list):
+        return [str(x) for x in v if x]
+    return [str(v)] if v else []
+
+
+def make_lexical_text(p: dict) -> str:
+    """
+    지역 / 정당 / 경력 / 학력 질의용 검색 텍스트 (BASIC payload 에 저장해 두고 색인 재생성 시 사용)
+    """
+    parts = []
+    parts.extend(_as_lines(p.get("address")))
+    parts.extend(_as_lines(p.get("career")))
+    parts.extend(_as_lines(p.get("education")))
+
+    party = p.get("politicalParty")
+    if isinstance(party, dict) and party.get("name"):
+        parts.append(party["name"])
+
+    for e in p.get("electors") or []:
+        if not isinstance(e, dict):
+            continue
+        e_party = e.get("politicalParty")
+        if isinstance(e_party, dict) and e_party.get("name"):
+            parts.append(e_party["name"])
+        zone = e.get("zoneElectionDistrict")
+        if isinstance(zone, dict):
+            city = (zone.get("zoneCity") or {}).get("name")
+            parts.append(" ".join(x for x in (city, zone.get("name")) if x))
+
+    # 같은 정당 / 지역이 여러 번 나오면 한 번만
+    return "\n".join(dict.fromkeys(x for x in parts if x))
+
+
+class LexicalIndex:
+    """
+    BM25 역색인
+    - 디스크 형식(npz): terms, 용어별 posting 시작 위치(CSR), posting 문서 번호 / tf, 문서 id / 길이
+    - 스냅샷이 갱신되면(mtime 변경) 다음 검색 때 다시 읽음
+    """
+
+    def __init__(self):
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.term_ids = None
+        self.offsets = None
+        self.post_docs = None
+        self.post_tf = None
+        self.doc_ids = None
+        self.doc_len = None
+        self.avg_len = 0.0
+
+    def _load(self):
+        try:
+            mtime = os.stat(LEXICAL_INDEX_PATH).st_mtime
+        except FileNotFoundError:
+            self.term_ids, self._mtime = None, None
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with np.load(LEXICAL_INDEX_PATH) as data:
+                self.term_ids = {t: i for i, t in enumerate(data["terms"].tolist())}
+                self.offsets = data["offsets"]
+                self.post_docs = data["post_docs"]
+                self.post_tf = data["post_tf"].astype(np.float32)
+                self.doc_ids = data["doc_ids"]
+                self.doc_len = data["doc_len"].astype(np.float32)
+            self.avg_len = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+            self._mtime = mtime
+            print(f"[LEXICAL INDEX] 문서 {len(self.doc_ids)}개 / 용어 {len(self.term_ids)}개 로드")
+
+    def available(self) -> bool:
+        self._load()
+        return self.term_ids is not None
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """
+        반환: [(id, bm25 점수), ...] 점수 내림차순 / 색인이 없으면 []
+        """
+        self._load()
+        if self.term_ids is None or len(self.doc_ids) == 0:
+            return []
+
+        n_docs = len(self.doc_ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len / max(self.avg_len, 1e-9))
+
+        for term in set(tokenize(query)):
+            t = self.term_ids.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end]
+            df = end - start
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+
+        hit = np.flatnonzero(scores)
+        if len(hit) == 0:
+            return []
+        k = min(limit, len(hit))
+        top = hit[np.argpartition(-scores[hit], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.doc_ids[i]), float(scores[i])) for i in top]
+
+    def max_score(self, query: str) -> float:
+        """
+        질의 용어를 모두 1번씩 포함한 평균 길이 문서의 BM25 점수 Σ idf (정규화 기준)
+        - 점수 상한 Σ idf·(k1+1) 은 tf → ∞ 일 때라 실제 문서는 절반도 못 받으므로 이 값을 기준으로 삼음
+        - 색인에 없는 용어도 df=0 의 idf 로 포함 → 질의 대부분이 안 맞으면 정규화 점수가 낮게 나옴
+        """
+        self._load()
+        if self.term_ids is None or len(self.doc_ids) == 0:
+            return 0.0
+        n_docs = len(self.doc_ids)
+        total = 0.0
+        for term in set(tokenize(query)):
+            t = self.term_ids.get(term)
+            df = 0 if t is None else int(self.offsets[t + 1] - self.offsets[t])
+            total += float(np.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+        return total
+
+
+def build_lexical_index(docs: dict, path: str = LEXICAL_INDEX_PATH):
+    """
+    docs: {id: lexical_text}
+    """
+    postings = {}
+    doc_ids = []
+    doc_len = []
+    for idx, (pid, text) in enumerate(docs.items()):
+        tokens = tokenize(text or "")
+        doc_ids.append(int(pid))
+        doc_len.append(len(tokens))
+        counts = {}
+        for tok in tokens:
+            counts[tok] = counts.get(tok, 0) + 1
+        for tok, c in counts.items():
+            postings.setdefault(tok, []).append((idx, c))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    post_docs = []
+    post_tf = []
+    for i, term in enumerate(terms):
+        plist = postings[term]
+        offsets[i + 1] = offsets[i] + len(plist)
+        post_docs.extend(d for d, _ in plist)
+        post_tf.extend(min(c, 65535) for _, c in plist)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # 고유한 임시 파일에 쓰고 교체해서, 읽는 워커가 반쯤 쓰인 파일을 보지 않도록 함
+    # (여러 워커가 동시에 재생성해도 서로의 임시 파일을 덮어쓰지 않음)
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(
+            f,
+            terms=np.array(terms, dtype=str),
+            offsets=offsets,
+            post_docs=np.asarray(post_docs, dtype=np.int32),
+            post_tf=np.asarray(post_tf, dtype=np.uint16),
+            doc_ids=np.asarray(doc_ids, dtype=np.int64),
+            doc_len=np.asarray(doc_len, dtype=np.int32)
+        )
+    os.replace(tmp, path)
+    print(f"[LEXICAL INDEX] 문서 {len(doc_ids)}개 / 용어 {len(terms)}개 저장")
+
+
+def rebuild_lexical_index():
+    docs = scroll_payload_field(QDRANT_COLLECTION_BASIC, "lexical_text")
+    build_lexical_index({pid: text for pid, text in docs.items() if text})
+
+
+lexical_index = LexicalIndex()
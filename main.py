@@ -1,189 +1,657 @@
 import os
+import json
+import time
+import weakref
 import asyncio
+import logging
 
-from qdrant_client.models import Filter, FieldCondition, MatchAny, NamedVector
-from fastapi import FastAPI, Header, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from apscheduler.schedulers.background import BackgroundScheduler
-from contextlib import asynccontextmanager
+from qdrant_client.models import ScoredPoint
+from fastapi import FastAPI, Header, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from contextlib import asynccontextmanager, aclosing
+from dotenv import load_dotenv
+
+# 아래 모듈들은 import 시점에 환경변수를 읽으므로 .env 를 먼저 로드
+load_dotenv()
 
+from admission import Overloaded, llm_stream_limiter, limiters
+from answer_cache import answer_cache
 from build_rag_prompt import build_rag_prompt
-from embedder import embed
-from extract.extract_name import extract_name_from_text
-from rank.rank import calc_additional_score
-from update_politicians import update_politicians_daily
-from store import init_collection, search_vectors, retrieve_by_id, qdrant
-from model import generate_stream
+from embedder import aembed, aembed_batch, normalize_text, warmup_embedder, embed_cache
+from extract.extract_name import afind_names
+from extract.name_matcher import rebuild_name_matcher, lookup_name_ids
+from lexical_index import lexical_index, rebuild_lexical_index
+from name_index import name_index, rebuild_name_index
+from rank.rank import calc_rank_features, rerank_scores
+from store import (
+    init_collection, asearch_vectors, aget_full_payloads, afind_ids_by_exact_names, asearch_names_batch,
+    aretrieve_many, asearch_by_ids, invalidate_detail_cache, asearch_text_batch
+)
+from sync_status import read_status
+from metrics import span, observe_stage, register_metrics, render_metrics
+from model import agenerate_stream
+from streaming import sse_stream, text_stream, sse_event, coalesce
 from config import QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL
-from dotenv import load_dotenv
-load_dotenv()
 
 AI_SECRET = os.getenv("AI_SECRET_KEY")
+# 이름 추출과 동시에 일반 BASIC 검색을 미리 시작 (필요 없으면 취소)
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "1") == "1"
+# 키워드(BM25) 점수를 0~1로 정규화해 벡터 점수에 더할 때의 가중치
+LEXICAL_WEIGHT = float(os.getenv("LEXICAL_WEIGHT", "0.5"))
+# 정규화 키워드 점수가 이보다 낮으면 (흔한 bigram 1~2개만 겹침) 무시
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "0.15"))
+# /answer/batch 한 번에 받을 최대 질문 수 (질문마다 LLM 스트림 자리 1개 사용)
+ANSWER_BATCH_MAX = int(os.getenv("ANSWER_BATCH_MAX", "8"))
+# sync_worker 상태 파일 확인 주기 (초)
+SYNC_POLL_SECONDS = float(os.getenv("SYNC_POLL_SECONDS", "30"))
+
+# 프롬프트 / 후보 목록 등 디버그 출력은 LOG_LEVEL=DEBUG 일 때만
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
+register_metrics(
+    lambda: {f"embed_cache_{k}": v for k, v in embed_cache.stats().items()},
+    counters=("embed_cache_hits", "embed_cache_misses")
+)
+register_metrics(
+    lambda: {f"answer_cache_{k}": v for k, v in answer_cache.stats().items()},
+    counters=("answer_cache_hits", "answer_cache_misses")
+)
+for _limiter in limiters:
+    register_metrics(_limiter.stats, counters=_limiter.counter_names())
 
 def verify_auth(x_ai_key: str = Header(None)):
     if x_ai_key != AI_SECRET:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-# 앱 시작 시 1회 + 매일 자동 업데이트
-scheduler = BackgroundScheduler()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- startup ---
     print("FastAPI STARTUP")
 
     init_collection()
+    rebuild_name_matcher()
+    if not name_index.available():
+        rebuild_name_index()
+    if not lexical_index.available():
+        rebuild_lexical_index()
+    warmup_embedder()
 
-    # 스케줄러 시작 (매일 3시 실행)
-    # scheduler.add_job(update_politicians_daily, "cron", hour=3, minute=0)
-    # scheduler.start()
-
-    # asyncio.create_task(run_update())
+    # 일일 동기화는 sync_worker.py 별도 프로세스에서 실행, 여기서는 결과만 반영
+    _sync_state["generation"] = read_status().get("generation", 0)
+    watcher = asyncio.create_task(watch_sync_status())
 
     yield   # <--- 여기까지가 startup
 
     # --- shutdown ---
     print("FastAPI SHUTDOWN")
-    scheduler.shutdown()
-
-async def run_update():
-    await asyncio.sleep(2)
-    update_politicians_daily()
+    watcher.cancel()
+
+
+_sync_state = {"generation": 0}
+_sync_refresh_lock = asyncio.Lock()
+
+
+async def refresh_after_sync() -> bool:
+    """
+    sync_worker 가 새 데이터를 반영했으면 이 프로세스의 캐시 / 색인 갱신
+    - 이름 벡터 / 키워드 색인 / payload 저장소는 파일이 바뀌면 알아서 다시 열림
+    - 이름 사전은 다시 만들고, 바뀐 정치인의 상세 / 답변 캐시만 제거
+    """
+    async with _sync_refresh_lock:
+        status = read_status()
+        generation = status.get("generation", 0)
+        if generation == _sync_state["generation"]:
+            return False
+
+        await asyncio.to_thread(rebuild_name_matcher)
+        if generation - _sync_state["generation"] == 1:
+            invalidate_detail_cache(status.get("detail_ids", []))
+            answer_cache.invalidate_politicians(status.get("changed_ids", []))
+        else:
+            # 여러 번의 동기화를 건너뛰었으면 바뀐 id 를 다 알 수 없으므로 전체 비우기
+            invalidate_detail_cache()
+            answer_cache.clear()
+
+        _sync_state["generation"] = generation
+        print(f"[SYNC] generation {generation} 반영")
+        return True
+
+
+async def watch_sync_status():
+    while True:
+        await asyncio.sleep(SYNC_POLL_SECONDS)
+        try:
+            await refresh_after_sync()
+        except Exception:
+            logger.exception("동기화 결과 반영 실패")
 
 app = FastAPI(lifespan=lifespan)
 
-# LLM 모델 호출 (스프링 webflux가 호출)
-@app.post("/answer", dependencies=[Depends(verify_auth)])
-async def answer(payload: dict):
-    user_query = payload.get("query", "")
-    if not user_query:
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # 과부하: 스트림을 열기 전에 429 / 503 으로 빠르게 거절
+    return PlainTextResponse(
+        f"서버가 혼잡합니다. 잠시 후 다시 시도해주세요. ({exc.stage}: {exc.reason})",
+        status_code=exc.status,
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.get("/sync/status")
+async def sync_status(auth=Depends(verify_auth)):
+    status = read_status()
+    status.pop("changed_ids", None)
+    status.pop("detail_ids", None)
+    return {**status, "applied_generation": _sync_state["generation"]}
+
+
+@app.post("/sync/refresh")
+async def sync_refresh(auth=Depends(verify_auth)):
+    # sync_worker 가 동기화를 마치고 호출 (폴링보다 빨리 반영)
+    refreshed = await refresh_after_sync()
+    return {"refreshed": refreshed, "generation": _sync_state["generation"]}
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def stream_response(request: Request, stream_format: str, source):
+    """
+    - text (기본): 기존 text/plain 프로토콜
+    - sse: text/event-stream, 토큰을 시간/크기 기준으로 모아서 전송
+    두 모드 모두 클라이언트 연결이 끊기면 LLM 스트림을 즉시 닫음
+    """
+    if stream_format == "sse":
         return StreamingResponse(
-            iter(["query가 없습니다.\n"]),
-            media_type="text/plain"
+            sse_stream(request, source),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
+    return StreamingResponse(text_stream(request, source), media_type="text/plain")
 
 
-    # 쿼리 임베딩
-    query_vec = embed(user_query)
+def message_response(stream_format: str, message: str):
+    if stream_format == "sse":
+        return StreamingResponse(
+            iter([sse_event(message), sse_event("[DONE]", event="done")]),
+            media_type="text/event-stream"
+        )
+    return StreamingResponse(
+        iter([message + "\n"]),
+        media_type="text/plain"
+    )
 
-    # 1) 이름 전용 임베딩 생성
-    names = extract_name_from_text(user_query, max_names=3)
-    print(names)
 
-    name_ids = []
+# LLM 모델 호출 (스프링 webflux가 호출)
+@app.post("/answer", dependencies=[Depends(verify_auth)])
+async def answer(payload: dict, request: Request):
+    # 투기적으로 띄운 작업은 응답을 만들고 나면 정리 (필요 없어진 검색은 취소)
+    tasks = []
+    try:
+        return await _answer(payload, request, tasks)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+            elif not t.cancelled():
+                t.exception()  # 사용하지 않은 작업의 예외도 회수
+
+
+async def _embed_query(user_query: str):
+    with span("query_embedding"):
+        return await aembed(user_query)
+
+
+async def _basic_search(query_vec_task):
+    # 이 작업이 취소돼도 공유 중인 쿼리 임베딩 작업은 취소되지 않도록 shield
+    query_vec = await asyncio.shield(query_vec_task)
+    with span("basic_search"):
+        return await asearch_vectors(QDRANT_COLLECTION_BASIC, query_vec, limit=5)
+
+
+def _lexical_scores(user_query: str) -> dict:
+    """
+    지역 / 정당 / 경력 키워드 검색 (로컬 BM25)
+    - 질의의 최대 가능 점수 기준 0~1 정규화 (1등이라도 흔한 bigram 만 겹치면 낮은 점수)
+    - LEXICAL_MIN_SCORE 미만은 버림
+    """
+    with span("lexical_search"):
+        lexical_hits = lexical_index.search(user_query, limit=5)
+        max_score = lexical_index.max_score(user_query) if lexical_hits else 0.0
+    if not lexical_hits or max_score <= 0:
+        return {}
+    scores = {pid: min(score / max_score, 1.0) for pid, score in lexical_hits}
+    return {pid: s for pid, s in scores.items() if s >= LEXICAL_MIN_SCORE}
+
+
+async def _resolve_names(names: list) -> dict:
+    """
+    이름 → 후보 정치인 id 목록
+    - 이름이 정확히 일치하면 로컬 이름 사전으로 바로 해결 (사전이 없을 때만 Qdrant payload 인덱스)
+    - 나머지 이름만 name_vector 검색 (로컬 인덱스 우선, 없으면 Qdrant batch 검색)
+    """
+    if not names:
+        return {}
+    with span("name_search"):
+        resolved = lookup_name_ids(names)
+        if resolved is None:
+            resolved = dict(await afind_ids_by_exact_names(names))
+        unresolved = [nm for nm in names if nm not in resolved]
+        if unresolved:
+            vecs = await aembed_batch(unresolved)
+            local = name_index.search(vecs, limit=5)
+            if local is not None:
+                for nm, name_results in zip(unresolved, local):
+                    resolved[nm] = [pid for pid, _ in name_results]
+            else:
+                for nm, name_results in zip(unresolved, await asearch_names_batch(vecs, limit=5)):
+                    resolved[nm] = [r.id for r in name_results]
+    return resolved
 
-    if names:
-        for nm in names:
-            vec = embed(nm)
 
-            # 2) name_vector로 먼저 검색 (이름 우선 검색)
-            name_results = qdrant.search(
-                collection_name=QDRANT_COLLECTION_BASIC,
-                query_vector=NamedVector(name="name_vector", vector=vec),
-                limit=5
-            )
+def _lexical_only_ids(candidates: list, lexical_scores: dict) -> list:
+    known = {int(c["item"].id) for c in candidates}
+    return [pid for pid in lexical_scores if pid not in known]
 
-            found_ids = [r.id for r in name_results]
-            name_ids.extend(found_ids)
 
-    name_ids = list(set(name_ids))
-    candidates = []
+def _lexical_candidates(ids: list, payloads: dict) -> list:
+    return [
+        {"item": ScoredPoint(id=pid, version=0, score=0.0, payload=payloads[pid])}
+        for pid in ids if pid in payloads
+    ]
 
-    # 3) 이름 후보가 있으면 content_vector + filter 검색
-    if name_ids:
-        print("이름 후보 찾음!!")
-        print(name_ids)
-        filtered = qdrant.search(
-            collection_name=QDRANT_COLLECTION_BASIC,
-            query_vector=NamedVector(name="text_vector", vector=query_vec),
-            limit=15,
-            query_filter=Filter(
-                must=[FieldCondition(
-                    key="id",
-                    match=MatchAny(any=name_ids)
-                )]
-            )
+
+async def _rerank(candidates: list, lexical_scores: dict) -> list:
+    """
+    후보 중복 제거 + elector / votePercentage / 키워드 점수 기반 rerank
+    - 반환: 최종 점수 0.2 이상인 후보 (점수 내림차순)
+    """
+    # 같은 정치인이 여러 경로로 잡히면 점수가 높은 것만 남김
+    unique = {}
+    for c in candidates:
+        pid = int(c["item"].id)
+        if pid not in unique or c["item"].score > unique[pid]["item"].score:
+            unique[pid] = c
+    candidates = list(unique.values())
+
+    # 수집 시 계산해 둔 rank_features 사용
+    with span("rerank"):
+        # rank_features 가 없는 예전 payload 는 상세 정보로 계산
+        legacy_ids = [
+            int(c["item"].id) for c in candidates
+            if "full" not in c and "rank_features" not in (c["item"].payload or {})
+        ]
+        if legacy_ids:
+            legacy_full = await aget_full_payloads(legacy_ids)
+            for c in candidates:
+                if int(c["item"].id) in legacy_full:
+                    c["full"] = legacy_full[int(c["item"].id)]
+
+        features = [
+            calc_rank_features(c["full"]) if "full" in c
+            else (c["item"].payload or {}).get("rank_features", {})
+            for c in candidates
+        ]
+        # 벡터 점수 + 키워드 점수 융합
+        base_scores = [
+            c["item"].score + LEXICAL_WEIGHT * lexical_scores.get(int(c["item"].id), 0.0)
+            for c in candidates
+        ]
+        scores = rerank_scores(base_scores, features)
+        for c, score in zip(candidates, scores):
+            c["final_score"] = float(score)
+
+        reranked = sorted(candidates, key=lambda x: x["final_score"], reverse=True)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("reranked: %s", [(int(c["item"].id), c["final_score"]) for c in reranked])
+
+    return [c for c in reranked if c["final_score"] >= 0.2]
+
+
+def _answer_cache_key(user_query: str, top_k: list) -> tuple:
+    # 답변 캐시 키 (질의 + top-k 정치인 + 데이터 버전)
+    return (
+        normalize_text(user_query),
+        tuple(sorted({int(c["item"].id) for c in top_k})),
+        tuple(
+            (c["item"].payload or {}).get("content_hash", "")
+            for c in sorted(top_k, key=lambda c: int(c["item"].id))
         )
+    )
+
+
+async def _fill_full_payloads(top_ks: list):
+    """
+    최종 top-k 만 상세 정보 조회 (캐시 + 1회 배치 조회)
+    - top_ks: 질의별 top-k 후보 리스트, 여러 질의에 겹치는 정치인은 한 번만 조회
+    """
+    missing_ids = list(dict.fromkeys(
+        int(c["item"].id) for top_k in top_ks for c in top_k if "full" not in c
+    ))
+    if not missing_ids:
+        return
+    with span("detail_retrieval"):
+        full_payloads = await aget_full_payloads(missing_ids)
+    for top_k in top_ks:
+        for c in top_k:
+            if "full" not in c:
+                c["full"] = full_payloads.get(int(c["item"].id))
+    lost = [pid for pid in missing_ids if pid not in full_payloads]
+    if lost:
+        logger.warning("payload 저장소에 상세 정보 없음 (동기화 필요): %s", lost)
+
+
+async def _replay(chunks: list):
+    for chunk in chunks:
+        yield chunk
+
+
+def _llm_stream(prompt: str, slot, cache_key: tuple, query_vec):
+    """
+    LLM 스트리밍 응답
+    - 끝나면(또는 중단되면) LLM 자리 반환, 끝까지 생성된 답변만 캐시
+    """
+    async def stream():
+        chunks = []
+        start = time.perf_counter()
+        try:
+            async with aclosing(agenerate_stream(prompt)) as llm_chunks:
+                async for chunk in llm_chunks:
+                    if not chunks:
+                        observe_stage("llm_ttft", time.perf_counter() - start)
+                    chunks.append(chunk)
+                    yield chunk
+        finally:
+            slot.release()
+        observe_stage("llm_stream_total", time.perf_counter() - start)
+
+        answer_cache.put(*cache_key, chunks, query_vec)
+
+    body = stream()
+    # 스트림이 시작도 못 하고 버려지는 경우에도 자리 반환
+    weakref.finalize(body, slot.release)
+    return body
+
+
+async def _answer(payload: dict, request: Request, tasks: list):
+    user_query = payload.get("query", "")
+    stream_format = payload.get("format", "text")
+    if not user_query:
+        return message_response(stream_format, "query가 없습니다.")
+
+    # 쿼리 임베딩 / 일반 BASIC 검색은 이름 추출과 동시에 시작
+    query_vec_task = asyncio.create_task(_embed_query(user_query))
+    tasks.append(query_vec_task)
+    basic_task = None
+    if SPECULATIVE_SEARCH:
+        basic_task = asyncio.create_task(_basic_search(query_vec_task))
+        tasks.append(basic_task)
+
+    lexical_scores = _lexical_scores(user_query)
 
-        for res in filtered:
-            pid = res.id
-            detail_payload = retrieve_by_id(QDRANT_COLLECTION_DETAIL, pid)
-            full_payload = detail_payload.get("full_payload", detail_payload)
-            candidates.append({"item": res, "full": full_payload})
+    # 1) 이름 추출
+    with span("name_extraction"):
+        names = await afind_names(user_query, max_names=3)
+    logger.debug("names: %s", names)
 
-            print(pid)
+    # 2) 이름 → 후보 정치인 id
+    resolved = await _resolve_names(names)
+    name_ids = list({pid for ids in resolved.values() for pid in ids})
 
-    # 4) 이름 기반 후보 부족 → BASIC 일반 검색
+    query_vec = await query_vec_task
+    candidates = []
+
+    # 3) 이름 후보가 있으면 content_vector + filter 검색
+    # (상세 payload는 rerank 이후 최종 top-k 만 조회)
+    if name_ids:
+        logger.debug("이름 후보 찾음: %s", name_ids)
+        with span("filtered_search"):
+            filtered = await asearch_by_ids(QDRANT_COLLECTION_BASIC, query_vec, name_ids, limit=15)
+        candidates.extend({"item": res} for res in filtered)
+
+    # 4) 이름 기반 후보 부족 → BASIC 일반 검색 (미리 띄워 둔 결과 사용, 충분하면 취소)
     if len(candidates) < 3:
-        basic_results = search_vectors(QDRANT_COLLECTION_BASIC, query_vec, limit=5)
-        for res in basic_results:
-            pid = res.id
-            detail_payload = retrieve_by_id(QDRANT_COLLECTION_DETAIL, pid)
-            full_payload = detail_payload.get("full_payload", detail_payload)
-            candidates.append({"item": res, "full": full_payload})
+        if basic_task is None:
+            basic_task = asyncio.create_task(_basic_search(query_vec_task))
+            tasks.append(basic_task)
+        candidates.extend({"item": res} for res in await basic_task)
+
+        # 벡터 검색에 없던 키워드 검색 결과도 후보로 추가 (BASIC payload 1회 배치 조회)
+        lexical_only = _lexical_only_ids(candidates, lexical_scores)
+        if lexical_only:
+            with span("lexical_payloads"):
+                payloads = await aretrieve_many(QDRANT_COLLECTION_BASIC, lexical_only)
+            candidates.extend(_lexical_candidates(lexical_only, payloads))
+    elif basic_task is not None:
+        basic_task.cancel()
 
     # 5) basic 결과가 전혀 없으면 detail 컬렉션에서 직접 검색
     if not candidates:
-        print("** 후보자를 찾지 못함 ** detail 검색 시작")
+        logger.info("후보자를 찾지 못함, detail 검색 시작")
         DETAIL_LIMIT = 5
-        detail_results = search_vectors(QDRANT_COLLECTION_DETAIL, query_vec, limit=DETAIL_LIMIT)
+        with span("detail_search"):
+            detail_results = await asearch_vectors(QDRANT_COLLECTION_DETAIL, query_vec, limit=DETAIL_LIMIT)
 
         if not detail_results:
-            return StreamingResponse(
-                iter(["관련 정치인을 찾지 못했습니다.\n"]),
-                media_type="text/plain"
-            )
+            return message_response(stream_format, "관련 정치인을 찾지 못했습니다.")
 
-        for res in detail_results:
-            payload = res.payload
-            if isinstance(payload, dict) and "full_payload" in payload:
-                full_payload = payload["full_payload"]
-            else:
-                full_payload = payload
+        # 원본 JSON 은 rerank / top-k 단계에서 로컬 저장소에서 읽음
+        candidates.extend({"item": res} for res in detail_results)
 
-            candidates.append({
-                "item": res,
-                "full": full_payload
-            })
-
-    # 6) elector + votePercentage 기반 rerank 적용
-    reranked = []
-    for c in candidates:
-        base_score = c["item"].score
-        full_payload = c["full"]
-
-        bonus = calc_additional_score(full_payload)
-        final_score = base_score + bonus
-
-        reranked.append({
-            "item": c["item"],
-            "full": full_payload,
-            "final_score": final_score
-        })
-
-    reranked.sort(key=lambda x: x["final_score"], reverse=True)
-    print(reranked)
-
-    filtered = [c for c in reranked if c["final_score"] >= 0.2]
+    # 6) elector + votePercentage 기반 rerank
+    filtered = await _rerank(candidates, lexical_scores)
     if not filtered:
-        return StreamingResponse(
-            iter(["유사도 낮음: 관련 정치인을 찾지 못했습니다.\n"]),
-            media_type="text/plain"
-        )
+        return message_response(stream_format, "유사도 낮음: 관련 정치인을 찾지 못했습니다.")
 
     top_k = filtered[:3]
-    full_payload = [c["full"] for c in top_k]
 
-    # 7) RAG 프롬프트 생성
-    prompt = build_rag_prompt(user_query, [full_payload])
+    # 답변 캐시 조회
+    cache_key = _answer_cache_key(user_query, top_k)
+    cached_chunks = answer_cache.get(*cache_key, query_vec)
+    if cached_chunks is not None:
+        return stream_response(request, stream_format, _replay(cached_chunks))
 
-    # 8) LLM 스트리밍 응답
-    def stream():
-        for chunk in generate_stream(prompt):
-            yield chunk + "\n"
+    await _fill_full_payloads([top_k])
+    full_payload = [c["full"] for c in top_k if c.get("full") is not None]
+    # 상세 정보 없이 빈 context 로 LLM 을 호출하지 않음
+    if not full_payload:
+        return message_response(stream_format, "정치인 상세 정보를 찾지 못했습니다.")
 
-    return StreamingResponse(stream(), media_type="text/plain")
+    # 7) RAG 프롬프트 생성
+    with span("prompt_build"):
+        prompt = build_rag_prompt(user_query, full_payload)
 
+    # LLM 스트림 자리 확보 (한도 초과 시 Overloaded → 429/503)
+    slot = await llm_stream_limiter.acquire()
+
+    # 8) LLM 스트리밍 응답
+    return stream_response(request, stream_format, _llm_stream(prompt, slot, cache_key, query_vec))
+
+
+def _batch_items(queries) -> list:
+    """
+    [{"id": ..., "query": ...}] 또는 ["질문", ...] → [(id, query)]
+    - id 가 없으면 입력 순서(0, 1, ...)를 id 로 사용
+    """
+    items = []
+    for i, q in enumerate(queries or []):
+        if isinstance(q, dict):
+            items.append((str(q.get("id", i)), q.get("query", "")))
+        else:
+            items.append((str(i), q))
+    return items
+
+
+async def multiplex_stream(request: Request, stream_format: str, sources: dict, slots: list = ()):
+    """
+    여러 답변 스트림을 동시에 돌리면서 id 를 붙여 하나의 응답으로 섞어 보냄
+    - text (기본): NDJSON 한 줄씩 {"id", "text"} / 끝나면 {"id", "done": true}
+    - sse: event: chunk / end, data 는 같은 JSON, 전체가 끝나면 event: done
+    - 한 질문의 LLM 오류는 {"id", "error"} 로 알리고 나머지는 계속 진행
+    - 클라이언트 연결이 끊기면 모든 LLM 스트림을 닫음
+    - slots: 끝날 때 반환할 LLM 자리 (시작도 못 한 스트림은 자기 finally 로 반환하지 못함)
+    """
+    queue = asyncio.Queue()
+
+    async def pump(qid, source):
+        try:
+            async with aclosing(coalesce(source)) as chunks:
+                async for chunk in chunks:
+                    await queue.put({"id": qid, "text": chunk})
+            await queue.put({"id": qid, "done": True})
+        except Exception as e:
+            logger.exception("batch 답변 생성 실패: %s", qid)
+            await queue.put({"id": qid, "error": str(e)})
+
+    def encode(msg: dict) -> str:
+        data = json.dumps(msg, ensure_ascii=False)
+        if stream_format == "sse":
+            return sse_event(data, event="chunk" if "text" in msg else "end")
+        return data + "\n"
+
+    pumps = [asyncio.create_task(pump(qid, source)) for qid, source in sources.items()]
+    remaining = len(pumps)
+    try:
+        while remaining:
+            msg = await queue.get()
+            if "text" not in msg:
+                remaining -= 1
+            if await request.is_disconnected():
+                return
+            yield encode(msg)
+        if stream_format == "sse":
+            yield sse_event("[DONE]", event="done")
+    finally:
+        for t in pumps:
+            t.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+        for source in sources.values():
+            await source.aclose()
+        # 시작 전 generator 는 aclose() 해도 try/finally 에 들어가지 않으므로 직접 반환 (중복 반환은 무시됨)
+        for slot in slots:
+            slot.release()
+
+
+@app.post("/answer/batch", dependencies=[Depends(verify_auth)])
+async def answer_batch(payload: dict, request: Request):
+    """
+    여러 질문을 한 번에 처리 (비교 페이지 / 추천 질문 미리 생성 등)
+    - 질의 임베딩 1회 배치, 이름 필터 + 일반 검색을 Qdrant batch 요청 1회로
+    - 상세 정보는 배치 전체에서 겹치는 정치인까지 한 번만 조회
+    - 답변은 id 를 붙인 조각으로 한 스트림에 섞어 전송 (multiplex_stream)
+    """
+    stream_format = payload.get("format", "text")
+    items = [(qid, q) for qid, q in _batch_items(payload.get("queries")) if q]
+    if not items:
+        raise HTTPException(status_code=400, detail="queries가 없습니다.")
+    if len(items) > ANSWER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {ANSWER_BATCH_MAX}개 질문까지 가능합니다.")
+    if len({qid for qid, _ in items}) != len(items):
+        raise HTTPException(status_code=400, detail="질문 id 가 중복되었습니다.")
+    queries = [q for _, q in items]
+
+    # 1) 질의 임베딩(1회 배치) + 이름 추출 동시 진행
+    async def embed_all():
+        with span("query_embedding"):
+            return await aembed_batch(queries)
+
+    async def extract_all():
+        with span("name_extraction"):
+            return await asyncio.gather(*(afind_names(q, max_names=3) for q in queries))
+
+    query_vecs, names_per_query = await asyncio.gather(embed_all(), extract_all())
+    lexical = [_lexical_scores(q) for q in queries]
+
+    # 2) 배치 전체의 이름을 한 번에 후보 id 로
+    resolved = await _resolve_names(list(dict.fromkeys(nm for names in names_per_query for nm in names)))
+    name_ids = [list({pid for nm in names for pid in resolved.get(nm, [])}) for names in names_per_query]
+
+    # 3) 이름 필터 검색 + 일반 BASIC 검색을 Qdrant batch 요청 1회로
+    searches = []
+    for vec, ids in zip(query_vecs, name_ids):
+        if ids:
+            searches.append((vec, 15, ids))
+        searches.append((vec, 5, None))
+    with span("batch_search"):
+        results = iter(await asearch_text_batch(QDRANT_COLLECTION_BASIC, searches))
+
+    candidates, lexical_only = [], []
+    for ids, lexical_scores in zip(name_ids, lexical):
+        cands = [{"item": res} for res in (next(results) if ids else [])]
+        basic = next(results)
+        extra = []
+        # 이름 기반 후보 부족 → 일반 검색 결과 + 키워드 검색 결과 추가
+        if len(cands) < 3:
+            cands.extend({"item": res} for res in basic)
+            extra = _lexical_only_ids(cands, lexical_scores)
+        candidates.append(cands)
+        lexical_only.append(extra)
+
+    extra_ids = list(dict.fromkeys(pid for extra in lexical_only for pid in extra))
+    if extra_ids:
+        with span("lexical_payloads"):
+            payloads = await aretrieve_many(QDRANT_COLLECTION_BASIC, extra_ids)
+        for cands, extra in zip(candidates, lexical_only):
+            cands.extend(_lexical_candidates(extra, payloads))
+
+    # 4) 후보가 전혀 없는 질의만 detail 컬렉션 batch 검색
+    empty = [i for i, cands in enumerate(candidates) if not cands]
+    if empty:
+        with span("detail_search"):
+            detail_results = await asearch_text_batch(
+                QDRANT_COLLECTION_DETAIL, [(query_vecs[i], 5, None) for i in empty]
+            )
+        for i, res in zip(empty, detail_results):
+            candidates[i].extend({"item": r} for r in res)
+
+    # 5) 질의별 rerank → 캐시 / 메시지 / LLM 대상 분류
+    sources = {}
+    pending = []
+    for (qid, query), vec, cands, lexical_scores in zip(items, query_vecs, candidates, lexical):
+        if not cands:
+            sources[qid] = _replay(["관련 정치인을 찾지 못했습니다."])
+            continue
+        filtered = await _rerank(cands, lexical_scores)
+        if not filtered:
+            sources[qid] = _replay(["유사도 낮음: 관련 정치인을 찾지 못했습니다."])
+            continue
+        top_k = filtered[:3]
+        cache_key = _answer_cache_key(query, top_k)
+        cached_chunks = answer_cache.get(*cache_key, vec)
+        if cached_chunks is not None:
+            sources[qid] = _replay(cached_chunks)
+            continue
+        sources[qid] = None  # 입력 순서 유지용 자리
+        pending.append((qid, query, vec, top_k, cache_key))
+
+    # 6) LLM 이 필요한 질의들의 상세 정보는 한 번에 (겹치는 정치인 중복 제거)
+    await _fill_full_payloads([top_k for _, _, _, top_k, _ in pending])
+
+    prompts = []
+    for qid, query, vec, top_k, cache_key in pending:
+        full_payload = [c["full"] for c in top_k if c.get("full") is not None]
+        if not full_payload:
+            sources[qid] = _replay(["정치인 상세 정보를 찾지 못했습니다."])
+            continue
+        with span("prompt_build"):
+            prompts.append((qid, build_rag_prompt(query, full_payload), cache_key, vec))
+
+    # LLM 자리는 한 번에 모두 확보, 모자라면 기다리지 않고 배치 전체를 429 로 거절
+    slots = await llm_stream_limiter.acquire_many(len(prompts))
+    for (qid, prompt, cache_key, vec), slot in zip(prompts, slots):
+        sources[qid] = _llm_stream(prompt, slot, cache_key, vec)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        multiplex_stream(request, stream_format, sources, slots),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 if __name__ == "__main__":
     import uvicorn
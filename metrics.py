@@ -0,0 +1,82 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# 초 단위 히스토그램 버킷
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Prometheus 텍스트 포맷으로 내보내는 라벨별 히스토그램
+    """
+
+    def __init__(self, name: str, help_text: str, label: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label 값 -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[label_value] = series
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for lv, series in sorted(self._series.items()):
+                cumulative = 0
+                for b, c in zip(self.buckets, series):
+                    cumulative += c
+                    lines.append(f'{self.name}_bucket{{{self.label}="{lv}",le="{b}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{lv}",le="+Inf"}} {series[-1]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{lv}"}} {series[-2]}')
+                lines.append(f'{self.name}_count{{{self.label}="{lv}"}} {series[-1]}')
+        return lines
+
+
+stage_seconds = Histogram("answer_stage_seconds", "/answer 단계별 소요 시간(초)", "stage")
+
+# 캐시 등 다른 모듈의 수치를 /metrics 에 노출하기 위한 수집 함수들: [(collector, counter 이름들)]
+_collectors = []
+
+
+def register_metrics(collector, counters=()):
+    """
+    collector: () -> {metric_name: value} 를 반환하는 함수
+    counters: 그중 누적값(counter)인 metric 이름들, 나머지는 gauge 로 내보냄
+    """
+    _collectors.append((collector, frozenset(counters)))
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(stage, time.perf_counter() - start)
+
+
+def render_metrics() -> str:
+    lines = stage_seconds.render()
+    for collector, counters in _collectors:
+        for name, value in collector().items():
+            lines.append(f"# TYPE {name} {'counter' if name in counters else 'gauge'}")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,10 +1,11 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 load_dotenv()
 
-client = OpenAI(
+# 이벤트 루프용 비동기 클라이언트
+aclient = AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
     base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 )
@@ -12,9 +13,9 @@ client = OpenAI(
 MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 
 
-# LLM 스트리밍
-def generate_stream(prompt: str):
-    stream = client.chat.completions.create(
+# LLM 스트리밍 (비동기)
+async def agenerate_stream(prompt: str):
+    stream = await aclient.chat.completions.create(
         model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         stream=True,
@@ -22,19 +23,23 @@ def generate_stream(prompt: str):
         temperature=0.0
     )
 
-    for chunk in stream:
-        choice = chunk.choices[0]
-        delta = choice.delta
+    try:
+        async for chunk in stream:
+            choice = chunk.choices[0]
+            delta = choice.delta
 
-        # content만 스트리밍
-        text = getattr(delta, "content", None)
-        if text:
-            yield text
+            # content만 스트리밍
+            text = getattr(delta, "content", None)
+            if text:
+                yield text
+    finally:
+        # 중간에 중단되면(클라이언트 연결 끊김 등) upstream 연결도 바로 닫음
+        await stream.close()
 
 
-# 소규모 LLM
-def run_small_llm(prompt: str, max_new_tokens: int = 16) -> str:
-    response = client.chat.completions.create(
+# 소규모 LLM (비동기)
+async def arun_small_llm(prompt: str, max_new_tokens: int = 16) -> str:
+    response = await aclient.chat.completions.create(
         model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=max_new_tokens,
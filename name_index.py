@@ -0,0 +1,128 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from config import QDRANT_COLLECTION_BASIC
+from store import scroll_vectors
+
+NAME_INDEX_DIR = os.getenv("NAME_INDEX_DIR", "data/name_index")
+# 현재 스냅샷 버전 디렉터리 이름이 적힌 포인터 파일 (ids / vectors 는 같은 버전 디렉터리에 함께 저장)
+_CURRENT_PATH = os.path.join(NAME_INDEX_DIR, "CURRENT")
+# 이보다 오래된 이전 버전 디렉터리는 재생성 때 삭제
+_STALE_SECONDS = 600
+
+
+def _read_current():
+    try:
+        with open(_CURRENT_PATH, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class NameIndex:
+    """
+    name_vector 전체를 메모리에 올린 exact 검색 인덱스
+    - 스냅샷(.npy)을 mmap 으로 열어 여러 워커가 같은 페이지를 공유
+    - 검색은 행렬-벡터 곱 1회 + top-k 선택
+    - 포인터 파일(CURRENT)이 가리키는 버전이 바뀌면 다음 검색 때 ids / vectors 를 함께 다시 연다
+    """
+
+    def __init__(self):
+        self.ids = None
+        self.vectors = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        version = _read_current()
+        if version is None:
+            self.ids, self.vectors, self._version = None, None, None
+            return
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            path = os.path.join(NAME_INDEX_DIR, version)
+            try:
+                vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+                ids = np.load(os.path.join(path, "ids.npy"))
+            except FileNotFoundError:
+                # 읽는 사이 더 새 버전이 게시되고 이 버전이 정리됨 → 다음 검색 때 새 버전을 읽음
+                return
+            self.ids, self.vectors, self._version = ids, vectors, version
+            print(f"[NAME INDEX] {len(self.ids)}개 로드 ({version})")
+
+    def available(self) -> bool:
+        self._load()
+        return self.vectors is not None
+
+    def search(self, vectors, limit: int = 5):
+        """
+        vectors: (n, 384) 질의 벡터
+        반환: 질의별 [(id, score), ...] 리스트 / 스냅샷이 없으면 None (→ Qdrant 사용)
+        """
+        self._load()
+        if self.vectors is None or len(self.ids) == 0:
+            return None
+
+        q = np.asarray(vectors, dtype=np.float32)
+        q = q / np.clip(np.linalg.norm(q, axis=1, keepdims=True), 1e-12, None)
+        scores = q @ self.vectors.T
+
+        k = min(limit, scores.shape[1])
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(int(self.ids[i]), float(row[i])) for i in top])
+        return results
+
+
+def rebuild_name_index():
+    """
+    BASIC 컬렉션의 name_vector 로 스냅샷 재생성 (정규화해서 저장 → 내적 = cosine)
+    """
+    ids, vectors = scroll_vectors(QDRANT_COLLECTION_BASIC, "name_vector")
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+    if len(ids):
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    os.makedirs(NAME_INDEX_DIR, exist_ok=True)
+    # 새 버전 디렉터리(이름 고유)에 ids / vectors 를 모두 쓴 뒤 포인터만 원자적으로 교체
+    # → 여러 워커가 동시에 재생성해도 서로의 파일을 덮어쓰지 않고, 읽는 쪽은 항상 짝이 맞는 한 벌만 봄
+    path = tempfile.mkdtemp(prefix=f"v{time.time_ns()}-", dir=NAME_INDEX_DIR)
+    np.save(os.path.join(path, "ids.npy"), np.asarray(ids, dtype=np.int64))
+    np.save(os.path.join(path, "vectors.npy"), vectors)
+    version = os.path.basename(path)
+
+    previous = _read_current()
+    fd, tmp = tempfile.mkstemp(prefix="CURRENT.", dir=NAME_INDEX_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, _CURRENT_PATH)
+    _remove_old_versions(keep={version, previous})
+    print(f"[NAME INDEX] 스냅샷 {len(ids)}개 저장 ({version})")
+
+
+def _remove_old_versions(keep: set):
+    """
+    게시되지 않았거나 교체된 버전 디렉터리 정리
+    - 현재 / 직전 버전은 아직 읽는 중인 워커가 있을 수 있어 남겨 둠
+    - 만든 지 _STALE_SECONDS 가 안 된 디렉터리는 다른 워커가 쓰는 중일 수 있어 건드리지 않음
+    """
+    cutoff = time.time_ns() - _STALE_SECONDS * 10 ** 9
+    for name in os.listdir(NAME_INDEX_DIR):
+        if not name.startswith("v") or name in keep:
+            continue
+        created = name[1:].split("-", 1)[0]
+        if created.isdigit() and int(created) < cutoff:
+            shutil.rmtree(os.path.join(NAME_INDEX_DIR, name), ignore_errors=True)
+
+
+name_index = NameIndex()
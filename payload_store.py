@@ -0,0 +1,106 @@
+import os
+import json
+import shutil
+import sqlite3
+import threading
+import zlib
+
+PAYLOAD_DB_PATH = os.getenv("PAYLOAD_DB_PATH", "data/payloads.sqlite3")
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS payloads (id INTEGER PRIMARY KEY, data BLOB NOT NULL)"
+
+
+def _encode(payload: dict) -> bytes:
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+class PayloadStore:
+    """
+    정치인 원본 JSON 로컬 저장소 (politicianId → zlib 압축 JSON, SQLite)
+    - 읽기 전용 연결, 파일이 교체되면(inode / mtime 변경) 다시 연다
+    """
+
+    def __init__(self, path: str = PAYLOAD_DB_PATH):
+        self.path = path
+        self._conn = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime)
+        if stamp != self._stamp:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._stamp = stamp
+        return self._conn
+
+    def get_many(self, ids: list) -> dict:
+        """
+        반환: {id: payload} (저장소에 없는 id는 빠짐)
+        """
+        if not ids:
+            return {}
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return {}
+            ids = [int(i) for i in ids]
+            rows = conn.execute(
+                f"SELECT id, data FROM payloads WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {int(pid): _decode(blob) for pid, blob in rows}
+
+
+class PayloadWriter:
+    """
+    동기화용 writer
+    - 현재 파일을 임시 파일로 복사한 뒤 변경분만 반영
+    - commit() 때 os.replace 로 한 번에 교체 → 읽는 쪽은 항상 완성된 파일만 봄
+    """
+
+    def __init__(self, path: str = PAYLOAD_DB_PATH):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            shutil.copyfile(path, self.tmp_path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self._conn = sqlite3.connect(self.tmp_path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+
+    def ids(self) -> set:
+        # 저장소에 이미 있는 정치인 id (비어 있거나 새 호스트면 빈 집합 → 동기화 때 채워 넣음)
+        return {int(pid) for (pid,) in self._conn.execute("SELECT id FROM payloads")}
+
+    def put_many(self, payloads: list):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO payloads (id, data) VALUES (?, ?)",
+            [(int(p["politicianId"]), _encode(p)) for p in payloads]
+        )
+
+    def delete_many(self, ids: list):
+        self._conn.executemany("DELETE FROM payloads WHERE id = ?", [(int(i),) for i in ids])
+
+    def commit(self):
+        self._conn.commit()
+        self._conn.close()
+        os.replace(self.tmp_path, self.path)
+        print(f"[PAYLOAD STORE] {self.path} 교체 완료")
+
+    def abort(self):
+        self._conn.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+payload_store = PayloadStore()
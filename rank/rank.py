@@ -1,34 +1,41 @@
-def calc_additional_score(payload: dict) -> float:
+import numpy as np
+
+
+def calc_rank_features(payload: dict) -> dict:
     """
-    payload: 정치인 JSON 전체
-    electors 배열 기반 가중치 계산
-    - electors 개수 × 0.5점
-    - winner 있으면 +1점
-    - votePercentage(0~100)를 0~1로 정규화해 모두 합산
+    rerank에 필요한 electors 요약값 (수집 시 1회 계산해 BASIC payload에 저장)
+    - elector_count: electors 개수
+    - has_winner: 당선 이력 여부
+    - vote_score: votePercentage(0~100)를 0~1로 정규화해 /5 한 값의 합
     """
-    score = 0.0
-
     electors = payload.get("electors", [])
     if not isinstance(electors, list):
-        return score  # 잘못된 구조면 0점
-
-    # 1) electors 개수 × 0.5점
-    score += len(electors) * 0.05
-
-    # 2) winner 존재하면 +1점
-    for e in electors:
-        if isinstance(e, dict) and e.get("winner") is True:
-            score += 0.1
-            break
+        return {"elector_count": 0, "has_winner": False, "vote_score": 0.0}
 
-    # 3) votePercentage 점수: 0~100 → 0~1 변환해서 합산
+    vote_score = 0.0
     for e in electors:
         if not isinstance(e, dict):
             continue
-
         vp = e.get("votePercentage")
         if isinstance(vp, (int, float)):
-            # 0~1로 정규화하여 점수에 추가
-            score += max(0.0, min(vp / 100.0, 1.0) / 5)
+            vote_score += max(0.0, min(vp / 100.0, 1.0) / 5)
+
+    return {
+        "elector_count": len(electors),
+        "has_winner": any(isinstance(e, dict) and e.get("winner") is True for e in electors),
+        "vote_score": vote_score
+    }
+
 
-    return score
\ No newline at end of file
+def rerank_scores(base_scores, features: list):
+    """
+    검색 점수 + 미리 계산된 feature 로 최종 점수를 한 번에 계산
+    - electors 개수 × 0.05 + 당선 이력 0.1 + vote_score
+    """
+    base = np.asarray(base_scores, dtype=np.float64)
+    if len(features) == 0:
+        return base
+    counts = np.fromiter((f.get("elector_count", 0) for f in features), dtype=np.float64, count=len(features))
+    winners = np.fromiter((bool(f.get("has_winner")) for f in features), dtype=np.float64, count=len(features))
+    votes = np.fromiter((f.get("vote_score", 0.0) for f in features), dtype=np.float64, count=len(features))
+    return base + counts * 0.05 + winners * 0.1 + votes
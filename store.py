@@ -1,44 +1,197 @@
 import os
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, HnswConfigDiff, PointStruct, NamedVector
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    VectorParams, Distance, HnswConfigDiff, PointStruct, NamedVector, PointIdsList,
+    PayloadSchemaType, SearchRequest, Filter, FieldCondition, MatchAny,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    CreateAliasOperation, CreateAlias, DeleteAliasOperation, DeleteAlias
+)
+from payload_store import payload_store
 from config import QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL, QDRANT_HOST, QDRANT_PORT
 from dotenv import load_dotenv
 load_dotenv()
 
-qdrant = QdrantClient(QDRANT_HOST, port=QDRANT_PORT, api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+# ":memory:" 등을 지정하면 서버 없이 로컬 모드로 동작 (벤치마크용)
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION")
+
+if QDRANT_LOCATION:
+    qdrant = QdrantClient(location=QDRANT_LOCATION)
+    aqdrant = AsyncQdrantClient(location=QDRANT_LOCATION)
+else:
+    qdrant = QdrantClient(QDRANT_HOST, port=QDRANT_PORT, api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+    # /answer 등 이벤트 루프에서 사용하는 비동기 클라이언트
+    aqdrant = AsyncQdrantClient(QDRANT_HOST, port=QDRANT_PORT, api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", "2000"))
+# 예전 컬렉션 → alias 전환 순간의 404 를 재시도하기 전 대기 시간 (초)
+ALIAS_SWAP_RETRY_DELAY = float(os.getenv("QDRANT_ALIAS_SWAP_RETRY_DELAY", "0.2"))
+
+
+async def _retry_missing_collection(call):
+    """
+    예전 컬렉션 → alias 전환 순간의 404 를 한 번 재시도 (/answer 조회용 a* 함수에서 사용)
+    - call: 호출할 때마다 새 코루틴을 만드는 인자 없는 함수
+    """
+    try:
+        return await call()
+    except UnexpectedResponse as e:
+        if e.status_code != 404:
+            raise
+        await asyncio.sleep(ALIAS_SWAP_RETRY_DELAY)
+        return await call()
+
+# HNSW 튜닝 값 (정치인 수천 명 규모 기준)
+HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128"))
+
+# 컬렉션(alias) 별 물리 컬렉션 설정과 필터용 payload 인덱스
+COLLECTION_VECTORS = {
+    QDRANT_COLLECTION_BASIC: {
+        "text_vector": VectorParams(size=384, distance=Distance.COSINE, on_disk=True),
+        "name_vector": VectorParams(size=384, distance=Distance.COSINE, on_disk=True)
+    },
+    QDRANT_COLLECTION_DETAIL: VectorParams(size=384, distance=Distance.COSINE, on_disk=True),
+}
+PAYLOAD_INDEXES = {
+    QDRANT_COLLECTION_BASIC: {
+        "id": PayloadSchemaType.INTEGER,     # /answer 의 MatchAny(id) 필터
+        "name": PayloadSchemaType.KEYWORD,   # 이름 정확 일치 조회
+    },
+    QDRANT_COLLECTION_DETAIL: {},
+}
+
+
+def _aliases() -> dict:
+    return {a.alias_name: a.collection_name for a in qdrant.get_aliases().aliases}
+
+
+def create_physical_collection(alias: str) -> str:
+    """
+    alias 뒤에 붙일 새 버전의 물리 컬렉션 생성
+    - int8 scalar quantization (원본 벡터는 디스크, 양자화 벡터는 RAM)
+    - HNSW 튜닝 + 필터 필드 payload 인덱스
+    """
+    name = f"{alias}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    qdrant.create_collection(
+        collection_name=name,
+        vectors_config=COLLECTION_VECTORS[alias],
+        hnsw_config=HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+        on_disk_payload=True
+    )
+    ensure_payload_indexes(alias, name)
+    print(f"[QDRANT] Collection '{name}' created.")
+    return name
+
 
 def init_collection():
     collections = qdrant.get_collections().collections
     existing = [c.name for c in collections]
+    aliases = _aliases()
 
-    if QDRANT_COLLECTION_BASIC in existing:
-        print(f"[QDRANT] Collection '{QDRANT_COLLECTION_BASIC}' already exists. Skip creating.")
-        return
-    else:
-        qdrant.create_collection(
-            collection_name=QDRANT_COLLECTION_BASIC,
-            vectors_config={
-                "text_vector": VectorParams(size=384, distance=Distance.COSINE),
-                "name_vector": VectorParams(size=384, distance=Distance.COSINE)
-            },
-            hnsw_config=HnswConfigDiff(on_disk=True)
+    for alias in (QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL):
+        if alias in aliases:
+            print(f"[QDRANT] Alias '{alias}' -> '{aliases[alias]}' already exists. Skip creating.")
+            ensure_payload_indexes(alias)
+        elif alias in existing:
+            # alias 도입 전 컬렉션: 다음 동기화 때 버전 컬렉션으로 교체됨
+            print(f"[QDRANT] Collection '{alias}' already exists (no alias). Skip creating.")
+            ensure_payload_indexes(alias)
+        else:
+            name = create_physical_collection(alias)
+            swap_aliases({alias: name})
+
+
+def ensure_payload_indexes(alias: str, collection_name: str = None):
+    # 이미 있으면 Qdrant가 무시
+    for field, schema in PAYLOAD_INDEXES[alias].items():
+        qdrant.create_payload_index(
+            collection_name=collection_name or alias,
+            field_name=field,
+            field_schema=schema
         )
-        print(f"[QDRANT] Collection '{QDRANT_COLLECTION_BASIC}' created.")
 
-    if QDRANT_COLLECTION_DETAIL in existing:
-        print(f"[QDRANT] Collection '{QDRANT_COLLECTION_DETAIL}' already exists. Skip creating.")
-        return
-    else:
-        qdrant.create_collection(
-            collection_name=QDRANT_COLLECTION_DETAIL,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE),
-            hnsw_config=HnswConfigDiff(on_disk=True)
+
+def swap_aliases(mapping: dict) -> list:
+    """
+    {alias: 새 물리 컬렉션} 을 한 번의 요청으로 원자적으로 교체
+    - 반환: 더 이상 쓰지 않는 이전 물리 컬렉션 이름들
+    """
+    aliases = _aliases()
+    existing = {c.name for c in qdrant.get_collections().collections}
+    operations = []
+    legacy = []
+    old = []
+
+    for alias, name in mapping.items():
+        create = CreateAliasOperation(create_alias=CreateAlias(collection_name=name, alias_name=alias))
+        if alias in aliases:
+            old.append(aliases[alias])
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+            operations.append(create)
+        elif alias in existing:
+            legacy.append((alias, create))
+        else:
+            operations.append(create)
+
+    if operations:
+        qdrant.update_collection_aliases(change_aliases_operations=operations)
+
+    # alias 도입 전 컬렉션(최초 1회): Qdrant 는 alias 와 컬렉션 이름 공간이 같아서
+    # 같은 이름의 alias 를 만들려면 예전 컬렉션을 지워야 함.
+    # 새 버전 컬렉션은 이미 완성돼 있으므로 삭제 직후 바로 alias 를 만들고,
+    # 그 사이의 짧은 404 는 조회 함수(a*)의 _retry_missing_collection 이 한 번 재시도로 흡수
+    for alias, create in legacy:
+        qdrant.delete_collection(alias)
+        qdrant.update_collection_aliases(change_aliases_operations=[create])
+        print(f"[QDRANT] Legacy collection '{alias}' → alias 로 전환")
+
+    for alias, name in mapping.items():
+        print(f"[QDRANT] Alias '{alias}' -> '{name}'")
+    return old
+
+
+def drop_collections(names: list):
+    for name in names:
+        qdrant.delete_collection(name)
+        print(f"[QDRANT] Collection '{name}' deleted.")
+
+
+def copy_collection(src: str, dst: str, page_size: int = 500):
+    """
+    src(alias 가능)의 포인트를 벡터 포함 그대로 dst 로 복사 (재임베딩 없음)
+    """
+    offset = None
+    total = 0
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=src,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
         )
-        print(f"[QDRANT] Collection '{QDRANT_COLLECTION_DETAIL}' created.")
+        if points:
+            qdrant.upsert(
+                collection_name=dst,
+                points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                wait=False
+            )
+            total += len(points)
+        if offset is None:
+            break
+    print(f"[QDRANT] '{src}' -> '{dst}' {total}건 복사")
 
 
-def upsert_batch(collection_name: str, points: list):
+def upsert_batch(collection_name: str, points: list, wait: bool = True):
     point_structs = []
     for p in points:
         if "vector" in p and p["vector"] is not None:
@@ -50,19 +203,206 @@ def upsert_batch(collection_name: str, points: list):
                 PointStruct(id=int(p["id"]), payload=p["payload"])
             )
 
-    qdrant.upsert(collection_name=collection_name, points=point_structs)
+    qdrant.upsert(collection_name=collection_name, points=point_structs, wait=wait)
+
+
+def delete_by_ids(collection_name: str, ids: list):
+    if not ids:
+        return
+    qdrant.delete(
+        collection_name=collection_name,
+        points_selector=PointIdsList(points=[int(i) for i in ids])
+    )
+
+
+def scroll_payload_field(collection_name: str, field: str, page_size: int = 1000) -> dict:
+    """
+    컬렉션 전체를 순회하며 {id: payload[field]} 반환
+    """
+    result = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=[field],
+            with_vectors=False
+        )
+        for p in points:
+            result[int(p.id)] = (p.payload or {}).get(field)
+        if offset is None:
+            break
+    return result
+
+
+def scroll_vectors(collection_name: str, vector_name: str, page_size: int = 1000):
+    """
+    컬렉션 전체의 (id 리스트, 벡터 리스트) 반환
+    """
+    ids, vectors = [], []
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=[vector_name]
+        )
+        for p in points:
+            vec = p.vector.get(vector_name) if isinstance(p.vector, dict) else p.vector
+            if vec is not None:
+                ids.append(int(p.id))
+                vectors.append(vec)
+        if offset is None:
+            break
+    return ids, vectors
+
+
+async def aretrieve_many(collection_name: str, ids: list) -> dict:
+    if not ids:
+        return {}
+    ids = [int(i) for i in ids]
+    res = await _retry_missing_collection(
+        lambda: aqdrant.retrieve(collection_name=collection_name, ids=ids, with_vectors=False)
+    )
+    return {int(r.id): r.payload for r in res}
+
+
+async def afind_ids_by_exact_names(names: list) -> dict:
+    """
+    name keyword 인덱스로 이름이 정확히 일치하는 정치인 조회 (벡터 검색 없음)
+    - 반환: {name: [id, ...]}
+    """
+    if not names:
+        return {}
+    points, _ = await _retry_missing_collection(lambda: aqdrant.scroll(
+        collection_name=QDRANT_COLLECTION_BASIC,
+        scroll_filter=Filter(must=[FieldCondition(key="name", match=MatchAny(any=list(names)))]),
+        limit=len(names) * 10,
+        with_payload=["name"],
+        with_vectors=False
+    ))
+    result = {}
+    for p in points:
+        result.setdefault((p.payload or {}).get("name"), []).append(int(p.id))
+    return result
+
+
+async def asearch_names_batch(vectors, limit=5) -> list:
+    """
+    여러 이름 벡터를 name_vector 공간에서 한 번의 batch 요청으로 검색
+    - 반환: 입력 순서대로 검색 결과 리스트
+    """
+    if len(vectors) == 0:
+        return []
+    requests = [
+        SearchRequest(vector=NamedVector(name="name_vector", vector=list(map(float, v))), limit=limit)
+        for v in vectors
+    ]
+    return await _retry_missing_collection(
+        lambda: aqdrant.search_batch(collection_name=QDRANT_COLLECTION_BASIC, requests=requests)
+    )
+
+
+async def asearch_text_batch(collection_name: str, searches: list) -> list:
+    """
+    여러 질의 벡터를 한 번의 batch 요청으로 검색 (/answer/batch)
+    - searches: (vector, limit, id 필터 목록 또는 None) 리스트
+    - BASIC 은 text_vector, DETAIL 은 단일 벡터 공간에서 검색
+    - 반환: 입력 순서대로 검색 결과 리스트 (payload 포함)
+    """
+    if not searches:
+        return []
+    named = isinstance(COLLECTION_VECTORS[collection_name], dict)
+    requests = []
+    for vector, limit, ids in searches:
+        vector = list(map(float, vector))
+        requests.append(SearchRequest(
+            vector=NamedVector(name="text_vector", vector=vector) if named else vector,
+            limit=limit,
+            filter=Filter(must=[FieldCondition(key="id", match=MatchAny(any=ids))]) if ids else None,
+            with_payload=True
+        ))
+    return await _retry_missing_collection(
+        lambda: aqdrant.search_batch(collection_name=collection_name, requests=requests)
+    )
+
+
+async def asearch_vectors(collection_name: str, vector, limit=3, filter=None):
+    # BASIC 은 text_vector, DETAIL 은 이름 없는 단일 벡터
+    if isinstance(COLLECTION_VECTORS[collection_name], dict):
+        vector = NamedVector(name="text_vector", vector=vector)
+    results = await _retry_missing_collection(
+        lambda: aqdrant.search(collection_name=collection_name, query_vector=vector, limit=limit, query_filter=filter)
+    )
+    return results
+
+
+async def asearch_by_ids(collection_name: str, vector, ids: list, limit=15):
+    """
+    id 필터를 건 벡터 검색 (이름으로 찾은 후보 정치인 안에서만 검색)
+    """
+    return await asearch_vectors(
+        collection_name, vector, limit=limit,
+        filter=Filter(must=[FieldCondition(key="id", match=MatchAny(any=list(ids)))])
+    )
+
+
+# --- DETAIL full_payload LRU 캐시 ---
+_detail_cache = OrderedDict()
+_detail_cache_lock = threading.Lock()
+
+
+def invalidate_detail_cache(ids=None):
+    """
+    ids가 없으면 전체 비우기, 있으면 해당 정치인만 제거
+    """
+    with _detail_cache_lock:
+        if ids is None:
+            _detail_cache.clear()
+            return
+        for i in ids:
+            _detail_cache.pop(int(i), None)
+
+
+async def aget_full_payloads(ids: list) -> dict:
+    """
+    정치인 id 목록의 full_payload 반환
+    - 1순위: 메모리 LRU 캐시
+    - 2순위: 로컬 payload 저장소 (payload_store.py)
+    - 3순위: 저장소에 없는 id 만 Qdrant DETAIL 의 full_payload 에서 1회 조회
+      (저장소 도입 후 첫 동기화 전 데이터, 결과는 LRU 캐시에만 넣음)
+    - 반환: {id: full_payload} (어디에도 없는 id는 빠짐)
+    """
+    ids = [int(i) for i in ids]
+    found = {}
+    missing = []
+
+    with _detail_cache_lock:
+        for i in ids:
+            if i in _detail_cache:
+                _detail_cache.move_to_end(i)
+                found[i] = _detail_cache[i]
+            elif i not in missing:
+                missing.append(i)
 
+    if missing:
+        fetched = payload_store.get_many(missing)
 
-def retrieve_by_id(collection_name: str, id_):
-    res = qdrant.retrieve(collection_name=collection_name, ids=[int(id_)])
-    if res and len(res) > 0:
-        return res[0].payload
-    return None
+        legacy = [i for i in missing if i not in fetched]
+        if legacy:
+            for i, payload in (await aretrieve_many(QDRANT_COLLECTION_DETAIL, legacy)).items():
+                if payload and "full_payload" in payload:
+                    fetched[i] = payload["full_payload"]
 
+        with _detail_cache_lock:
+            for i, full_payload in fetched.items():
+                found[i] = full_payload
+                _detail_cache[i] = full_payload
+                _detail_cache.move_to_end(i)
+            while len(_detail_cache) > DETAIL_CACHE_SIZE:
+                _detail_cache.popitem(last=False)
 
-def search_vectors(collection_name: str, vector, limit=3, filter=None):
-    results = qdrant.search(collection_name=collection_name, query_vector=NamedVector(
-                name="text_vector",
-                vector=vector
-            ), limit=limit, query_filter=filter)
-    return results
\ No newline at end of file
+    return found
@@ -0,0 +1,95 @@
+import os
+import asyncio
+from contextlib import aclosing
+
+# SSE 모드에서 토큰을 모아 보내는 기준 (시간 / 글자 수 중 먼저 도달하는 쪽)
+STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "50"))
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "64"))
+
+
+async def coalesce(source, interval_ms: float = STREAM_FLUSH_INTERVAL_MS, max_chars: int = STREAM_FLUSH_CHARS):
+    """
+    작은 토큰 조각들을 모아서 한 번에 내보냄
+    - 버퍼가 max_chars 이상이 되거나, 첫 토큰이 들어온 뒤 interval_ms 가 지나면 flush
+    - upstream 이 멈춰 있어도 타이머로 flush 되도록 다음 토큰은 task 로 기다림
+    """
+    loop = asyncio.get_running_loop()
+    interval = interval_ms / 1000.0
+    it = source.__aiter__()
+    buf = []
+    size = 0
+    deadline = None
+    pending = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+
+            timeout = None if not buf else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buf)
+                buf, size, deadline = [], 0, None
+                continue
+
+            task, pending = pending, None
+            try:
+                text = task.result()
+            except StopAsyncIteration:
+                break
+
+            if not buf:
+                deadline = loop.time() + interval
+            buf.append(text)
+            size += len(text)
+            if size >= max_chars:
+                yield "".join(buf)
+                buf, size, deadline = [], 0, None
+
+        if buf:
+            yield "".join(buf)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # 취소된 __anext__ 가 source 안에서 빠져나온 뒤에 닫아야 함 (실행 중인 generator 는 aclose 불가)
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(source, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def sse_event(data: str, event: str = None) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    # 여러 줄 데이터는 줄마다 data: 로 나눠 보냄 (클라이언트가 \n 으로 다시 합침)
+    for line in data.split("\n"):
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def until_disconnected(request, source):
+    """
+    클라이언트 연결이 끊기면 즉시 중단하고 upstream(LLM 스트림)을 닫음
+    """
+    async with aclosing(source) as chunks:
+        async for chunk in chunks:
+            if await request.is_disconnected():
+                break
+            yield chunk
+
+
+async def sse_stream(request, source):
+    async with aclosing(until_disconnected(request, coalesce(source))) as chunks:
+        async for chunk in chunks:
+            yield sse_event(chunk)
+    if not await request.is_disconnected():
+        yield sse_event("[DONE]", event="done")
+
+
+async def text_stream(request, source):
+    # 기존 text/plain 프로토콜 (조각마다 줄바꿈) 유지
+    async with aclosing(until_disconnected(request, source)) as chunks:
+        async for chunk in chunks:
+            yield chunk + "\n"
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+
+SYNC_STATUS_PATH = os.getenv("SYNC_STATUS_PATH", "data/sync_status.json")
+
+
+def read_status(path: str = SYNC_STATUS_PATH) -> dict:
+    """
+    sync_worker 가 남긴 상태 파일 읽기
+    - 파일이 없거나 쓰는 중이면 빈 상태 반환
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"state": "never_run", "generation": 0}
+
+
+def write_status(status: dict, path: str = SYNC_STATUS_PATH):
+    """
+    상태 파일 원자적 교체 (tmp 에 쓰고 os.replace)
+    - API 프로세스는 언제 읽어도 완성된 JSON 만 봄
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    status = {**status, "updated_at": time.time()}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class StatusReporter:
+    """
+    동기화 1회의 진행 상황을 상태 파일에 기록
+    - generation: 데이터가 실제로 바뀐 동기화 횟수, API 는 이 값이 바뀌면 캐시를 갱신
+    - 페이지 진행 상황은 SYNC_STATUS_INTERVAL 초에 한 번만 기록
+    """
+
+    def __init__(self, path: str = SYNC_STATUS_PATH, interval: float = None):
+        self.path = path
+        self.interval = interval if interval is not None else float(os.getenv("SYNC_STATUS_INTERVAL", "2"))
+        prev = read_status(path)
+        self.status = {
+            "state": "running",
+            "pid": os.getpid(),
+            "started_at": time.time(),
+            "finished_at": None,
+            "progress": {},
+            "stats": prev.get("stats"),
+            "error": None,
+            "generation": prev.get("generation", 0),
+            "changed_ids": prev.get("changed_ids", []),
+            "detail_ids": prev.get("detail_ids", []),
+        }
+        self._last_write = 0.0
+        write_status(self.status, path)
+
+    def progress(self, info: dict):
+        if info.get("phase") == "done":
+            self.status["stats"] = {k: info[k] for k in ("added", "changed", "unchanged", "removed")}
+            self.status["changed_ids"] = info.get("changed_ids", [])
+            self.status["detail_ids"] = info.get("detail_ids", [])
+            return
+        self.status["progress"] = info
+        now = time.monotonic()
+        if now - self._last_write >= self.interval:
+            self._last_write = now
+            write_status(self.status, self.path)
+
+    def finish(self):
+        self.status.update(state="succeeded", finished_at=time.time())
+        stats = self.status["stats"] or {}
+        if stats.get("added") or stats.get("changed") or stats.get("removed"):
+            self.status["generation"] += 1
+        write_status(self.status, self.path)
+
+    def fail(self, exc: BaseException):
+        self.status.update(state="failed", finished_at=time.time(), error=repr(exc))
+        write_status(self.status, self.path)
@@ -0,0 +1,135 @@
+"""
+정치인 데이터 일일 동기화 전용 프로세스
+- API(main.py) 와 분리해서 실행: 전체 재임베딩이 서빙 코어 / GIL 을 쓰지 않도록
+- 임베딩은 nice / CPU 고정이 걸린 프로세스 풀에서 처리
+- 진행 상황은 sync_status.json 에 기록, 끝나면 API 에 캐시 갱신 신호 전송
+
+실행 예)
+  python sync_worker.py --once        # 1회 실행
+  python sync_worker.py               # 매일 SYNC_CRON_HOUR:SYNC_CRON_MINUTE 에 실행
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import requests
+from apscheduler.schedulers.blocking import BlockingScheduler
+from dotenv import load_dotenv
+load_dotenv()
+
+# 동기화 임베딩은 사이드카(embed_server.py)가 아니라 자체 프로세스 풀에서
+if os.getenv("EMBED_BACKEND") == "remote":
+    os.environ["EMBED_BACKEND"] = os.getenv("EMBED_SERVER_BACKEND", "torch")
+
+from embedder import EMBED_DIM
+from sync_status import StatusReporter
+
+# 임베딩 프로세스 수 / 프로세스당 torch 스레드 수
+SYNC_EMBED_PROCESSES = int(os.getenv("SYNC_EMBED_PROCESSES", "2"))
+SYNC_EMBED_THREADS = int(os.getenv("SYNC_EMBED_THREADS", "1"))
+# 0~19, 클수록 서빙 프로세스에 CPU 를 양보
+SYNC_NICE = int(os.getenv("SYNC_NICE", "10"))
+# 예) "6,7" → 6, 7번 코어만 사용 (비우면 제한 없음)
+SYNC_CPU_SET = os.getenv("SYNC_CPU_SET", "")
+SYNC_CRON_HOUR = int(os.getenv("SYNC_CRON_HOUR", "3"))
+SYNC_CRON_MINUTE = int(os.getenv("SYNC_CRON_MINUTE", "0"))
+# 동기화 후 호출할 API 주소 (예: http://localhost:8000/sync/refresh), 비우면 상태 파일 폴링에만 의존
+SYNC_NOTIFY_URL = os.getenv("SYNC_NOTIFY_URL", "")
+
+
+def _limit_cpu():
+    """
+    현재 프로세스의 CPU 사용 제한 (nice + 코어 고정)
+    """
+    if SYNC_NICE:
+        os.nice(SYNC_NICE)
+    if SYNC_CPU_SET and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {int(c) for c in SYNC_CPU_SET.split(",") if c.strip()})
+
+
+def _init_embed_process():
+    # nice / 코어 고정은 부모(main)에서 걸어둔 값을 그대로 상속
+    try:
+        import torch
+        torch.set_num_threads(SYNC_EMBED_THREADS)
+    except ImportError:
+        pass
+    from embedder import warmup_embedder
+    warmup_embedder()
+
+
+def _embed_chunk(texts: list) -> np.ndarray:
+    from embedder import embed_batch
+    return embed_batch(texts)
+
+
+class EmbedPool:
+    """
+    텍스트 리스트를 프로세스 수만큼 나눠 병렬 임베딩
+    - update_politicians_daily(embed=...) 에 그대로 넘기는 함수 형태
+    """
+
+    def __init__(self, processes: int = SYNC_EMBED_PROCESSES):
+        self.processes = max(1, processes)
+        self.pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_embed_process)
+
+    def __call__(self, texts: list) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, EMBED_DIM), dtype=np.float32)
+        size = -(-len(texts) // self.processes)
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        return np.concatenate(list(self.pool.map(_embed_chunk, chunks)), axis=0)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def notify_api():
+    if not SYNC_NOTIFY_URL:
+        return
+    try:
+        res = requests.post(SYNC_NOTIFY_URL, headers={"X-AI-KEY": os.getenv("AI_SECRET_KEY", "")}, timeout=10)
+        print(f"[SYNC] API 갱신 요청 → {res.status_code}")
+    except requests.RequestException as e:
+        # 알림이 실패해도 API 가 상태 파일을 폴링하므로 동기화 자체는 성공
+        print(f"[SYNC] API 갱신 요청 실패: {e}")
+
+
+def run_sync():
+    from update_politicians import update_politicians_daily
+
+    reporter = StatusReporter()
+    pool = EmbedPool()
+    try:
+        update_politicians_daily(embed=pool, on_progress=reporter.progress)
+    except Exception as e:
+        reporter.fail(e)
+        print(f"[SYNC] 실패: {e!r}")
+        raise
+    finally:
+        pool.close()
+    reporter.finish()
+    notify_api()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="정치인 데이터 동기화 워커")
+    parser.add_argument("--once", action="store_true", help="1회 실행 후 종료")
+    args = parser.parse_args()
+
+    # 페이지 수집 / 업서트 스레드도 서빙보다 낮은 우선순위로
+    _limit_cpu()
+
+    if args.once:
+        run_sync()
+        return
+
+    scheduler = BlockingScheduler()
+    scheduler.add_job(run_sync, "cron", hour=SYNC_CRON_HOUR, minute=SYNC_CRON_MINUTE)
+    print(f"[SYNC] 매일 {SYNC_CRON_HOUR:02d}:{SYNC_CRON_MINUTE:02d} 동기화 예약")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    main()
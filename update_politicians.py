@@ -1,19 +1,103 @@
+import os
+import queue
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
 import json
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from config import POLITICIAN_API_URL, QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL
-from embedder import embed
-from store import upsert_batch
+from embedder import embed_batch
+from lexical_index import make_lexical_text, rebuild_lexical_index
+from name_index import rebuild_name_index
+from payload_store import PayloadWriter
+from rank.rank import calc_rank_features
+from store import (
+    upsert_batch, delete_by_ids, scroll_payload_field,
+    create_physical_collection, copy_collection, swap_aliases, drop_collections
+)
+
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# 한 번에 삭제할 수 있는 최대 비율, 넘으면 API 응답 이상으로 보고 동기화 중단 (1 이면 제한 없음)
+SYNC_MAX_REMOVE_RATIO = float(os.getenv("SYNC_MAX_REMOVE_RATIO", "0.2"))
+
+
+def _make_session():
+    # 커넥션 재사용 + 일시적 오류 재시도
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["POST"])
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=FETCH_CONCURRENCY)
+    s = requests.Session()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+_session = _make_session()
 
 
 # 정치인 API 수집 (매일 1회)
 def fetch_page(page):
-    res = requests.post(POLITICIAN_API_URL, json={"page": page})
+    res = _session.post(POLITICIAN_API_URL, json={"page": page}, timeout=30)
     res.raise_for_status()
     return res.json().get("data", [])
 
 
+_PAGES_DONE = object()
+
+
+def _put(out_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    # 소비자가 멈추면(stop) 가득 찬 큐에서 영원히 기다리지 않도록 짧게 나눠 대기
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce_pages(out_queue: queue.Queue, stop: threading.Event):
+    """
+    페이지를 FETCH_CONCURRENCY 개씩 미리 병렬로 가져와 순서대로 큐에 넣음
+    - 빈 페이지가 나오면 종료
+    - 오류는 예외 객체로 큐에 넣어 소비자 쪽에서 다시 발생시킴
+    - 소비자가 실패해 stop 이 설정되면 남은 요청을 취소하고 종료
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="fetch") as pool:
+            next_page = 1
+            pending = {}
+            for _ in range(FETCH_CONCURRENCY):
+                pending[next_page] = pool.submit(fetch_page, next_page)
+                next_page += 1
+
+            page = 1
+            while True:
+                data = pending.pop(page).result()
+                if not data or not _put(out_queue, data, stop):
+                    for f in pending.values():
+                        f.cancel()
+                    break
+                pending[next_page] = pool.submit(fetch_page, next_page)
+                next_page += 1
+                page += 1
+    except Exception as e:
+        _put(out_queue, e, stop)
+    finally:
+        _put(out_queue, _PAGES_DONE, stop)
+
+
 JSON_SCHEMA_DESCRIPTION = """
 이 데이터는 대한민국 정치인의 상세정보 JSON 입니다.
 각 필드의 의미는 아래와 같습니다:
@@ -83,89 +167,276 @@ def make_basic_text(name, core):
     return prefix + json.dumps(core, ensure_ascii=False)
 
 def make_detail_payload(p):
-    return {"full_payload": p}
+    # 원본 JSON은 로컬 payload 저장소에 두고 Qdrant 에는 id 만 저장
+    return {"id": int(p["politicianId"])}
 
-def update_politicians_daily():
-    print("\n[UPDATE START]", datetime.now())
+# BASIC payload 구성이 바뀌면 올려서 다음 동기화 때 전체 재생성되도록 함
+PAYLOAD_SCHEMA_VERSION = 4
+
+# 검색 payload 전용 필드 (임베딩 텍스트에는 넣지 않음)
+NON_EMBEDDED_FIELDS = ("content_hash", "rank_features", "lexical_text")
+
+def content_hash(p) -> str:
+    # 키 정렬 + 공백 제거로 정규화한 원본 JSON의 지문
+    canonical = json.dumps(p, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{PAYLOAD_SCHEMA_VERSION}:{canonical}".encode("utf-8")).hexdigest()
+
+def make_core(p):
+    pid = int(p["politicianId"])
+    return {
+        "id": pid,
+        "name": p.get("name"),
+        "birthDate": p.get("birthDate"),
+        "address": p.get("address"),
+        "gender": p.get("gender"),
+        "criminalRecord": p.get("criminalRecord"),
+        "education": "\\n".join(
+            p.get("education", []) if isinstance(p.get("education", []), list) else [p.get("education", "")]),
+        "job": "\\n".join(
+            p.get("job", []) if isinstance(p.get("job", []), list) else [p.get("job", "")]),
+        "career": "\\n".join(
+            p.get("career", []) if isinstance(p.get("career", []), list) else [p.get("career", "")]),
+        "short_bio": f"정치인 이름이 '{p.get('name', '')}'인 사람의 성별은 {p.get('gender', '')}이고 생년월일은 {p.get('birthDate', '')}이다. 사는 곳은 {p.get('address', '')}이다. 범죄 기록은 {p.get('criminalRecord', '')}건이다.",
+        "content_hash": content_hash(p),
+        "rank_features": calc_rank_features(p),
+        "lexical_text": make_lexical_text(p)
+    }
+
+def build_points(data, embed=embed_batch):
+    """
+    한 페이지 분량의 정치인 데이터를 BASIC / DETAIL 포인트로 변환
+    - 벡터 종류별로 embed 1회씩 호출 (기본 embed_batch, sync_worker 는 프로세스 풀 사용)
+    """
+    cores = [make_core(p) for p in data]
+
+    # 1) 검색용 임베딩 (종류별 배치 인코딩)
+    vectors_text = embed([
+        make_basic_text(p.get("name"), {k: v for k, v in core.items() if k not in NON_EMBEDDED_FIELDS})
+        for p, core in zip(data, cores)
+    ])
+    vectors_detail = embed([make_basic_text(p.get("name"), p) for p in data])
+    vectors_name = embed([p.get("name", "") for p in data])
 
-    page = 1
-    total = 0
+    basic_points = []
+    detail_points = []
+    for i, (p, core) in enumerate(zip(data, cores)):
+        basic_points.append({
+            "id": core["id"],
+            "vector": {
+                "text_vector": vectors_text[i].tolist(),
+                "name_vector": vectors_name[i].tolist()
+            },
+            "payload": core
+        })
+
+        # 2) 원본 저장
+        detail_points.append({
+            "id": core["id"],
+            "vector": vectors_detail[i].tolist(),
+            "payload": make_detail_payload(p)
+        })
+
+    return basic_points, detail_points
+
+def _sync_into(targets: dict, existing_hashes: dict, writer: PayloadWriter, embed, on_progress) -> dict:
+    """
+    수집 / 임베딩 / 업서트 파이프라인
+    - 수집: 별도 스레드에서 페이지 병렬 prefetch → bounded 큐
+    - 임베딩: 현재 스레드에서 큐를 소비하며 신규/변경 정치인만 재임베딩
+    - 업서트: 단일 업로드 스레드에서 wait=False 로 전송, 마지막 배치만 wait=True (배리어)
+    - targets: {alias: 이번 동기화에서 쓰는 물리 컬렉션}, 처음엔 비어 있고
+      신규/변경/삭제가 처음 확인될 때 새 버전 컬렉션을 만들고 복사해서 채움 (변경이 없으면 만들지 않음)
+    - writer: 원본 JSON 을 쓰는 로컬 payload 저장소
+    - on_progress: 페이지마다 진행 상황(dict)을 받는 콜백
+    """
+    def prepare_targets():
+        if targets:
+            return
+        if on_progress is not None:
+            on_progress({"phase": "copying"})
+        for alias in (QDRANT_COLLECTION_BASIC, QDRANT_COLLECTION_DETAIL):
+            targets[alias] = create_physical_collection(alias)
+            copy_collection(alias, targets[alias])
+
+    seen_ids = set()
+    stored_ids = writer.ids()
+    result = {
+        "stats": {"added": 0, "changed": 0, "unchanged": 0, "removed": 0},
+        "changed_ids": [],
+        "upserted_ids": [],
+        "removed_ids": [],
+        "backfilled": 0,
+    }
+    stats = result["stats"]
     batch_basic = []
     batch_detail = []
     BATCH_SIZE = 200
 
-    while True:
-        data = fetch_page(page)
-        if not data:
-            break
-
-        for p in data:
-            pid = int(p["politicianId"])
-
-            core = {
-                "id": pid,
-                "name": p.get("name"),
-                "birthDate": p.get("birthDate"),
-                "address": p.get("address"),
-                "gender": p.get("gender"),
-                "criminalRecord": p.get("criminalRecord"),
-                "education": "\\n".join(
-                    p.get("education", []) if isinstance(p.get("education", []), list) else [p.get("education", "")]),
-                "job": "\\n".join(
-                    p.get("job", []) if isinstance(p.get("job", []), list) else [p.get("job", "")]),
-                "career": "\\n".join(
-                    p.get("career", []) if isinstance(p.get("career", []), list) else [p.get("career", "")]),
-                "short_bio": f"정치인 이름이 '{p.get('name', '')}'인 사람의 성별은 {p.get('gender', '')}이고 생년월일은 {p.get('birthDate', '')}이다. 사는 곳은 {p.get('address', '')}이다. 범죄 기록은 {p.get('criminalRecord', '')}건이다."
-            }
-
-            # 1) 검색용 임베딩
-            embedding_text = make_basic_text(p.get("name"), core)
-            vector_text = embed(embedding_text)
-
-            embedding_detail_text = make_basic_text(p.get("name"), p)
-            vector_detail = embed(embedding_detail_text)
-
-            vector_name = embed(p.get("name", ""))
-
-            basic_point = {
-                "id": pid,
-                "vector": {
-                    "text_vector": vector_text,
-                    "name_vector": vector_name
-                },
-                "payload": core
-            }
-
-            # 2) 원본 저장
-            detail_point = {
-                "id": pid,
-                "vector": vector_detail,
-                "payload": make_detail_payload(p)
-            }
-
-            batch_basic.append(basic_point)
-            batch_detail.append(detail_point)
-
-            total += 1
+    pages = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce_pages, args=(pages, stop), name="fetch-producer", daemon=True)
+    producer.start()
+
+    # 업서트는 순서 보장을 위해 단일 스레드에서 처리
+    uploader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+    uploads = []
+    last_sent = {}
+
+    def flush(collection_name, batch, label, wait=False):
+        uploads.append(uploader.submit(upsert_batch, collection_name, batch, wait))
+        last_sent[collection_name] = batch
+        print(f"[{label} BATCH] {len(batch)} 업로드 요청")
+
+    page = 0
+    try:
+        while True:
+            data = pages.get()
+            if data is _PAGES_DONE:
+                break
+            if isinstance(data, Exception):
+                raise data
+
+            dirty = []
+            backfill = []
+            for p in data:
+                pid = int(p["politicianId"])
+                seen_ids.add(pid)
+
+                if pid not in existing_hashes:
+                    stats["added"] += 1
+                elif existing_hashes[pid] != content_hash(p):
+                    stats["changed"] += 1
+                    result["changed_ids"].append(pid)
+                else:
+                    stats["unchanged"] += 1
+                    # 벡터는 그대로지만 로컬 payload 저장소에 없으면 원본만 채움 (재임베딩 없음)
+                    if pid not in stored_ids:
+                        backfill.append(p)
+                    continue
+                dirty.append(p)
+
+            if backfill:
+                writer.put_many(backfill)
+                result["backfilled"] += len(backfill)
+            if dirty:
+                prepare_targets()
+                writer.put_many(dirty)
+                basic_points, detail_points = build_points(dirty, embed)
+                batch_basic.extend(basic_points)
+                batch_detail.extend(detail_points)
+                result["upserted_ids"].extend(d["id"] for d in detail_points)
 
             if len(batch_basic) >= BATCH_SIZE:
-                upsert_batch(QDRANT_COLLECTION_BASIC, batch_basic)
-                print(f"[BASIC BATCH] {len(batch_basic)} 업로드 완료")
+                flush(targets[QDRANT_COLLECTION_BASIC], batch_basic, "BASIC")
                 batch_basic = []
 
             if len(batch_detail) >= BATCH_SIZE:
-                upsert_batch(QDRANT_COLLECTION_DETAIL, batch_detail)
-                print(f"[DETAIL BATCH] {len(batch_detail)} 업로드 완료")
+                flush(targets[QDRANT_COLLECTION_DETAIL], batch_detail, "DETAIL")
                 batch_detail = []
 
-        page += 1
+            page += 1
+            if on_progress is not None:
+                on_progress({"phase": "syncing", "pages": page, "seen": len(seen_ids), **stats})
+
+        # 마지막 배치는 wait=True 로 전송 (같은 컬렉션의 앞선 업서트까지 반영 보장)
+        # 남은 배치가 없으면 직전 배치를 한 번 더 보내 배리어로 사용 (upsert라 결과 동일)
+        for alias, batch, label in (
+            (QDRANT_COLLECTION_BASIC, batch_basic, "BASIC"),
+            (QDRANT_COLLECTION_DETAIL, batch_detail, "DETAIL"),
+        ):
+            if alias not in targets:
+                continue
+            collection_name = targets[alias]
+            final_batch = batch or last_sent.get(collection_name)
+            if final_batch:
+                flush(collection_name, final_batch, label, wait=True)
+
+        # 배리어: 모든 업로드 완료 확인 (실패 시 예외 전파)
+        for f in uploads:
+            f.result()
+    finally:
+        # 실패로 빠져나온 경우에도 생산자 스레드 / fetch 풀이 남지 않도록 정지 + 큐 비우기
+        stop.set()
+        while producer.is_alive():
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        uploader.shutdown(wait=True)
+
+    # API에서 사라진 정치인 삭제
+    removed_ids = [pid for pid in existing_hashes if pid not in seen_ids]
+    if existing_hashes and not seen_ids:
+        raise RuntimeError("정치인 API 가 빈 목록을 반환해 동기화를 중단합니다.")
+    if len(removed_ids) > len(existing_hashes) * SYNC_MAX_REMOVE_RATIO:
+        raise RuntimeError(
+            f"삭제 대상 {len(removed_ids)}/{len(existing_hashes)}명이 "
+            f"SYNC_MAX_REMOVE_RATIO({SYNC_MAX_REMOVE_RATIO}) 를 넘어 동기화를 중단합니다."
+        )
+    if removed_ids:
+        prepare_targets()
+        delete_by_ids(targets[QDRANT_COLLECTION_BASIC], removed_ids)
+        delete_by_ids(targets[QDRANT_COLLECTION_DETAIL], removed_ids)
+        writer.delete_many(removed_ids)
+    result["removed_ids"] = removed_ids
+    stats["removed"] = len(removed_ids)
+    return result
+
+
+def update_politicians_daily(embed=embed_batch, on_progress=None):
+    """
+    content_hash 기반 증분 동기화 + blue/green 교체
+    - 먼저 수집한 데이터의 content_hash 를 비교하고, 바뀐 게 있을 때만
+      현재 alias 가 가리키는 데이터를 새 버전 컬렉션으로 복사(재임베딩 없음)
+    - 신규/변경된 정치인만 재임베딩해서 새 컬렉션에 반영, 사라진 정치인은 삭제
+    - 끝나면 alias 를 한 번에 교체 → 조회 중인 요청은 항상 완성된 데이터만 봄
+    - 변경이 없으면 새 컬렉션을 만들지 않음
+    - embed: 텍스트 리스트 → 벡터 행렬 함수 (sync_worker 의 프로세스 풀 등)
+    - on_progress: 진행 상황 콜백 (copying / syncing / done)
+    - 반환: {"added", "changed", "unchanged", "removed"} 건수
+    """
+    print("\n[UPDATE START]", datetime.now())
+
+    # 현재 저장된 정치인별 지문
+    existing_hashes = scroll_payload_field(QDRANT_COLLECTION_BASIC, "content_hash")
+
+    targets = {}
+    writer = PayloadWriter()
+    try:
+        result = _sync_into(targets, existing_hashes, writer, embed, on_progress)
+    except BaseException:
+        writer.abort()
+        drop_collections(list(targets.values()))
+        raise
+
+    stats = result["stats"]
+    if not (stats["added"] or stats["changed"] or stats["removed"]):
+        # 벡터 변경이 없어도 payload 저장소를 채웠으면 파일은 교체
+        if result["backfilled"]:
+            writer.commit()
+        else:
+            writer.abort()
+    else:
+        writer.commit()
+        drop_collections(swap_aliases(targets))
 
-    # 마지막 남은 배치 처리
-    if batch_basic:
-        upsert_batch(QDRANT_COLLECTION_BASIC, batch_basic)
-        print(f"[BASIC BATCH] 마지막 {len(batch_basic)} 업로드 완료")
-    if batch_detail:
-        upsert_batch(QDRANT_COLLECTION_DETAIL, batch_detail)
-        print(f"[DETAIL BATCH] 마지막 {len(batch_detail)} 업로드 완료")
+        # alias 교체 이후 디스크 스냅샷(이름 벡터 / 키워드 색인) 재생성
+        # 이름 사전 / 상세 / 답변 캐시는 API 프로세스가 상태 파일의 id 로 직접 갱신 (main.refresh_after_sync)
+        rebuild_name_index()
+        rebuild_lexical_index()
 
-    print(f"[UPDATE] 총 {total}명 정치인 업로드 완료")
\ No newline at end of file
+    print(
+        f"[UPDATE] 신규 {stats['added']}명 / 변경 {stats['changed']}명 / "
+        f"유지 {stats['unchanged']}명 / 삭제 {stats['removed']}명"
+    )
+    if result["backfilled"]:
+        print(f"[UPDATE] payload 저장소 보충 {result['backfilled']}명")
+    if on_progress is not None:
+        # API 프로세스가 자기 캐시에서 지워야 할 정치인 id 도 함께 전달
+        on_progress({
+            "phase": "done",
+            **stats,
+            "changed_ids": result["changed_ids"] + result["removed_ids"],
+            "detail_ids": result["upserted_ids"] + result["removed_ids"]
+        })
+    return stats